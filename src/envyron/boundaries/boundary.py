@@ -1,10 +1,12 @@
 from abc import ABC, abstractmethod
 from typing import Optional
+from numpy import ndarray
 
 import numpy as np
 
 from ..domains import EnvironGrid
 from ..representations import EnvironDensity, EnvironGradient, EnvironHessian
+from ..representations.sparse import flat_view
 from ..representations.functions import EnvironERFC
 from ..cores import CoreContainer
 
@@ -44,20 +46,42 @@ class EnvironBoundary(ABC):
         self.grid = grid
         self.cores = cores
 
+        # boundary fields follow the precision of the derivatives core
+        if cores.has_derivatives:
+            self.dtype = cores.derivatives.dtype
+        else:
+            self.dtype = np.dtype(np.float64)
+
         boundary_label = f"{label}_boundary"
-        self.switch = EnvironDensity(grid, label=boundary_label)
+        self.switch = EnvironDensity(
+            grid,
+            label=boundary_label,
+            dtype=self.dtype,
+        )
 
         if self.deriv_level >= 1:
             gradient_label = f"{label}_boundary_gradient"
-            self.gradient = EnvironGradient(grid, label=gradient_label)
+            self.gradient = EnvironGradient(
+                grid,
+                label=gradient_label,
+                dtype=self.dtype,
+            )
 
         if self.deriv_level >= 2:
             laplacian_label = f"{label}_boundary_laplacian"
-            self.laplacian = EnvironDensity(grid, label=laplacian_label)
+            self.laplacian = EnvironDensity(
+                grid,
+                label=laplacian_label,
+                dtype=self.dtype,
+            )
 
         if self.deriv_level >= 3:
             dsurface_label = f"{label}_boundary_dsurface"
-            self.dsurface = EnvironDensity(grid, label=dsurface_label)
+            self.dsurface = EnvironDensity(
+                grid,
+                label=dsurface_label,
+                dtype=self.dtype,
+            )
 
     def activate_solvent_awareness(
         self,
@@ -84,20 +108,40 @@ class EnvironBoundary(ABC):
         )
 
         local_label = f"{self.label}_local"
-        self.local = EnvironDensity(self.grid, label=local_label)
+        self.local = EnvironDensity(
+            self.grid,
+            label=local_label,
+            dtype=self.dtype,
+        )
 
         probe_label = f"{self.label}_probe"
-        self.probe = EnvironDensity(self.grid, label=probe_label)
+        self.probe = EnvironDensity(
+            self.grid,
+            label=probe_label,
+            dtype=self.dtype,
+        )
 
         filling_label = f"{self.label}_filling"
-        self.filling = EnvironDensity(self.grid, label=filling_label)
+        self.filling = EnvironDensity(
+            self.grid,
+            label=filling_label,
+            dtype=self.dtype,
+        )
 
         dfilling_label = f"{self.label}_dfilling"
-        self.dfilling = EnvironDensity(self.grid, label=dfilling_label)
+        self.dfilling = EnvironDensity(
+            self.grid,
+            label=dfilling_label,
+            dtype=self.dtype,
+        )
 
         if self.deriv_level >= 3:
             hessian_label = f"{self.label}_boundary_hessian"
-            self.hessian = EnvironHessian(self.grid, label=hessian_label)
+            self.hessian = EnvironHessian(
+                self.grid,
+                label=hessian_label,
+                dtype=self.dtype,
+            )
 
     def activate_field_awareness(
         self,
@@ -179,10 +223,37 @@ class EnvironBoundary(ABC):
     def dboundary_dions(self, index: int) -> EnvironGradient:
         """docstring"""
 
+    @abstractmethod
+    def dboundary_dions_all(self, de_dboundary: EnvironDensity) -> ndarray:
+        """Forces on all ions from the dependence of the boundary on them.
+
+        Contracts the partial derivatives of the boundary with respect to
+        each ion with de_dboundary, returning a (3, nions) array.
+        """
+
     @abstractmethod
     def _build(self) -> None:
         """docstring"""
 
+    def _checkout_hessian(self) -> Optional[EnvironHessian]:
+        """Hessian used while building the boundary (if needed).
+
+        Unless kept by the solvent-aware boundary, it is borrowed from the
+        workspace of the cores and must be returned with `_release_hessian`.
+        """
+        if self.deriv_level < 3: return None
+        if self.solvent_aware: return self.hessian
+        return self.cores.workspace.checkout(
+            EnvironHessian,
+            self.grid,
+            self.dtype,
+        )
+
+    def _release_hessian(self, hessian: Optional[EnvironHessian]) -> None:
+        """docstring"""
+        if hessian is None or self.solvent_aware: return
+        self.cores.workspace.release(hessian)
+
     def _compute_derivatives_fft(
         self,
         density: EnvironDensity,
@@ -190,52 +261,64 @@ class EnvironBoundary(ABC):
     ) -> None:
         """docstring"""
 
-        if self.deriv_level >= 1:
-            self.gradient[:] = self.cores.derivatives.gradient(density)
-            self.gradient.compute_modulus()
+        levels = []
+        if self.deriv_level >= 1: levels.append('gradient')
+        if self.deriv_level >= 2: levels.append('laplacian')
+        if self.deriv_level == 3: levels.append('hessian')
+
+        out = {}
+        if self.deriv_level >= 1: out['gradient'] = self.gradient
+        if self.deriv_level >= 2: out['laplacian'] = self.laplacian
+        if self.deriv_level == 3: out['hessian'] = hessian
 
-        if self.deriv_level == 2:
-            self.laplacian[:] = self.cores.derivatives.laplacian(density)
+        self.cores.derivatives.derivatives(density, levels, out)
+
+        if self.deriv_level >= 1: self.gradient.compute_modulus()
 
         if self.deriv_level == 3:
-            self.dsurface[:] = self._calc_dsurface(
-                self.gradient,
-                hessian,
-                pre_compute=True,
-                density=density,
-                laplacian=self.laplacian,
-            )
+            self.dsurface[:] = self._calc_dsurface(self.gradient, hessian)
 
     def _calc_dsurface(
         self,
         gradient: EnvironGradient,
         hessian: EnvironHessian,
+        indices: Optional[ndarray] = None,
         pre_compute: bool = False,
         density: Optional[EnvironDensity] = None,
         laplacian: Optional[EnvironDensity] = None,
     ) -> EnvironDensity:
-        """docstring"""
+        """Derivative of the surface with respect to the boundary.
+
+        If `indices` are given, only these (flat) grid points are computed,
+        e.g. the interface band of the boundary.
+        """
 
         if pre_compute:
 
             for field in (density, laplacian):
                 if field is None: raise ValueError(f"missing {field}")
 
-            hessian[:] = self.cores.derivatives.hessian(density)
+            self.cores.derivatives.hessian(density, out=hessian)
             laplacian[:] = hessian.trace
 
         dsurface = EnvironDensity(gradient.grid)
 
-        mask = gradient.modulus >= 1e-50
+        modulus = flat_view(gradient.modulus, 1)[0]
+
+        if indices is None:
+            indices = np.flatnonzero(modulus >= 1e-50)
+        else:
+            indices = indices[modulus[indices] >= 1e-50]
 
-        g = gradient[:, mask]
-        h = hessian.reshape(3, 3, *gradient.grid.nr)[:, :, mask]
+        g = flat_view(gradient, 3)[:, indices]
+        h = flat_view(hessian, 9)[:, indices].reshape(3, 3, -1)
+        modulus = modulus[indices]
 
-        dsurface[mask] += np.einsum('i...,j...,ij...', g, g, h) - \
-                          np.einsum('i...,i...,jj...', g, g, h)
+        ghg = np.einsum('i...,j...,ij...', g, g, h)
+        ggtrace = np.einsum('i...,i...,jj...', g, g, h)
 
-        dsurface[mask] /= gradient.modulus[mask] / np.sqrt(
-            gradient.modulus[mask])
+        flat_view(dsurface, 1)[0, indices] = \
+            (ghg - ggtrace) / (modulus / np.sqrt(modulus))
 
         return dsurface
 
@@ -1,14 +1,16 @@
 from typing import Optional
+from numpy import ndarray
 
 import numpy as np
 
 from ..domains import EnvironGrid
 from ..representations import EnvironDensity, EnvironGradient, EnvironHessian
+from ..representations.sparse import flat_view
 from ..physical import EnvironElectrons, EnvironIons
 from ..cores import CoreContainer
 from . import EnvironBoundary
 
-from ..utils.constants import TPI
+from ..utils.kernels import switching_function
 
 
 class ElectronicBoundary(EnvironBoundary):
@@ -52,17 +54,39 @@ class ElectronicBoundary(EnvironBoundary):
             raise ValueError("missing ions")
 
         density_label = f"{label}_boundary_density"
-        self.density = EnvironDensity(grid, label=density_label)
+        self.density = EnvironDensity(
+            grid,
+            label=density_label,
+            dtype=self.dtype,
+        )
 
         density_label = f"{label}_dboundary"
-        self.dswitch = EnvironDensity(grid, label=density_label)
+        self.dswitch = EnvironDensity(
+            grid,
+            label=density_label,
+            dtype=self.dtype,
+        )
 
         density_label = f"{label}_d2boundary"
-        self.d2switch = EnvironDensity(grid, label=density_label)
+        self.d2switch = EnvironDensity(
+            grid,
+            label=density_label,
+            dtype=self.dtype,
+        )
+
+        # flat indices of the interface band, where rhomin < rho < rhomax
+        self.band = np.empty(0, dtype=np.intp)
 
     def update(self) -> None:
         """docstring"""
 
+        # keep the boundary if the density barely changed (and no ionic
+        # update is pending), so that its dependents are not rebuilt either
+        if self.electrons.updating and not self.electrons.changed and \
+                self.update_status != 1:
+            self.update_status = 0
+            return
+
         updating = False
         if self.mode == 'full': updating = updating or self.ions.updating
         updating = updating or self.electrons.updating
@@ -73,13 +97,8 @@ class ElectronicBoundary(EnvironBoundary):
 
         if self.mode == 'full':
 
-            if self.ions.updating:
-                self.ions.core_density[:] = 0.0
-
-                for core in self.ions.core_electrons:
-                    self.ions.core_density += core.density
-
-                self.update_status = 1
+            # core density already rebuilt by the ionic update
+            if self.ions.updating: self.update_status = 1
 
             if self.electrons.updating:
 
@@ -128,48 +147,54 @@ class ElectronicBoundary(EnvironBoundary):
 
         return partial
 
+    def dboundary_dions_all(self, de_dboundary: EnvironDensity) -> ndarray:
+        """docstring"""
+
+        if self.mode == 'electronic':
+            return np.zeros((3, 0 if self.ions is None else self.ions.count))
+
+        if len(self.ions.core_electrons) == 0:
+            raise ValueError("missing core electrons")
+
+        weight = np.ravel(de_dboundary * self.dswitch)
+
+        forces = np.empty((3, self.ions.count))
+        for i, core in enumerate(self.ions.core_electrons):
+            gradient = core.local('gradient')
+            forces[:, i] = gradient.values @ weight[gradient.indices]
+
+        return forces * self.grid.dV
+
+    def calc_vsoftcavity(
+        self,
+        de_dboundary: EnvironDensity,
+        vsoftcavity: EnvironDensity,
+    ) -> None:
+        """Soft-cavity potential, nonzero only on the interface band."""
+        vsoftcavity[:] = 0.
+        flat_view(vsoftcavity, 1)[0, self.band] = \
+            flat_view(de_dboundary, 1)[0, self.band] * \
+            flat_view(self.dswitch, 1)[0, self.band]
+        vsoftcavity.touch()
+
     def _build(self) -> None:
         """docstring"""
 
         self._generate_switching_function()
 
-        hessian = None
-        if self.deriv_level == 3:
-            if self.solvent_aware:
-                hessian = self.hessian
-            else:
-                hessian = EnvironHessian(self.grid)
+        hessian = self._checkout_hessian()
 
-        if self.deriv_method == 'fft':
-            self._compute_derivatives_fft(self.switch, hessian)
-        elif self.deriv_method == 'chain':
-            self._compute_derivatives_fft(self.density, hessian)
+        try:
+            if self.deriv_method == 'fft':
+                self._compute_derivatives_fft(self.switch, hessian)
+            elif self.deriv_method == 'chain':
+                self._compute_derivatives_chain(hessian)
 
-            if self.deriv_level == 3:
-
-                if self.solvent_aware:
-                    hessian[:] *= self.dswitch
-                    hessian[:] += np.reshape(
-                        np.einsum(
-                            'i...,j...,...->ji...',
-                            self.gradient,
-                            self.gradient,
-                            self.d2switch,
-                        ),
-                        (9, *self.grid.nr),
-                    )
-
-            if self.deriv_level > 1:
-                raise NotImplementedError("JF: I don't think laplacian has been initialized at this point, need to check")
-                self.laplacian[:] *= self.dswitch
-                self.laplacian[:] += np.sum(self.gradient**2, 0) * self.dswitch
-
-            if self.deriv_level >= 1:
-                self.gradient[:] *= self.dswitch
-                self.gradient.compute_modulus()
+            else:
+                raise ValueError(f"{self.deriv_method} not supported")
 
-        else:
-            raise ValueError(f"{self.deriv_method} not supported")
+        finally:
+            self._release_hessian(hessian)
 
         self.switch.compute_charge()
         self.volume = self.switch.charge
@@ -178,27 +203,92 @@ class ElectronicBoundary(EnvironBoundary):
             self.surface = self.gradient.modulus.charge
 
     def _generate_switching_function(self) -> None:
-        """docstring"""
+        """Switching function and its first two derivatives.
+
+        These are only evaluated on the interface band, where
+        rhomin < rho < rhomax, with a fused kernel. The switch is 0 or 1
+        elsewhere and its derivatives vanish.
+        """
 
-        self.switch[:] = 0.
+        rho = flat_view(self.density, 1)[0]
+        self.band = np.flatnonzero((self.rhomin < rho) & (rho < self.rhomax))
+
+        np.greater_equal(self.density, self.rhomax, out=self.switch,
+                         casting='unsafe')
         self.dswitch[:] = 0.
         self.d2switch[:] = 0.
 
-        mask = self.density <= self.rhomin
-        if np.any(mask): self.switch[mask] = 1.0
+        switching_function(
+            rho,
+            self.band,
+            self.rhomax,
+            self.factor,
+            flat_view(self.switch, 1)[0],
+            flat_view(self.dswitch, 1)[0],
+            flat_view(self.d2switch, 1)[0],
+        )
+
+        self.switch.touch()
+
+    def _compute_derivatives_chain(
+        self,
+        hessian: Optional[EnvironHessian],
+    ) -> None:
+        """Derivatives of the switch from those of the density.
+
+        The derivatives of the density are computed by the derivatives
+        core, while the chain rule is only applied on the interface band.
+        """
+
+        if self.deriv_level == 0: return
+
+        band = self.band
+
+        levels = ['gradient']
+        gradient = self.cores.workspace.checkout(
+            EnvironGradient,
+            self.grid,
+            self.dtype,
+            zero=False,
+        )
+        try:
+            out = {'gradient': gradient}
+
+            if self.deriv_level == 2:
+                levels.append('laplacian')
+                out['laplacian'] = self.laplacian
 
-        mask = (self.rhomin < self.density) & (self.density < self.rhomax)
-        if not np.any(mask): return
+            if self.deriv_level == 3:
+                levels.append('hessian')
+                out['hessian'] = hessian
+
+            self.cores.derivatives.derivatives(self.density, levels, out)
+
+            dswitch = flat_view(self.dswitch, 1)[:, band]
+            d2switch = flat_view(self.d2switch, 1)[:, band]
+            g = flat_view(gradient, 3)[:, band]
 
-        arg = np.log(self.rhomax / np.abs(self.density[mask])) * \
-              TPI / self.factor
+            if self.deriv_level == 2:
+                laplacian = flat_view(self.laplacian, 1)[:, band] * dswitch
+                laplacian += np.einsum('i...,i...', g, g) * d2switch
+                self.laplacian[:] = 0.
+                flat_view(self.laplacian, 1)[:, band] = laplacian
 
-        self.switch[mask] = (arg - np.sin(arg)) / TPI
-        self.switch[:] = 1.0 - self.switch
+            if self.deriv_level == 3:
+                h = flat_view(hessian, 9)[:, band] * dswitch
+                h += np.einsum('i...,j...->ij...', g, g).reshape(9, -1) * d2switch
+                hessian[:] = 0.
+                flat_view(hessian, 9)[:, band] = h
+                hessian.touch()
+
+            self.gradient[:] = 0.
+            flat_view(self.gradient, 3)[:, band] = g * dswitch
+            self.gradient.touch()
+            self.gradient.compute_modulus()
 
-        self.dswitch[mask] = -(np.cos(arg) - 1.0) / \
-                               np.abs(self.density[mask]) / self.factor
+        finally:
+            self.cores.workspace.release(gradient)
 
-        self.d2switch[mask] = \
-            -(TPI * np.sin(arg) + self.factor * (1.0 - np.cos(arg))) / \
-             (self.density[mask] * self.factor)**2
+        if self.deriv_level == 3:
+            self.laplacian[:] = hessian.trace
+            self.dsurface[:] = self._calc_dsurface(self.gradient, hessian, band)
@@ -1,15 +1,25 @@
 from copy import deepcopy
-from typing import Optional
+from typing import List, Optional
+from numpy import ndarray
 
 import numpy as np
 
 from ..domains import EnvironGrid
-from ..representations import EnvironDensity, EnvironGradient, EnvironHessian
+from ..representations import (
+    EnvironField,
+    EnvironDensity,
+    EnvironGradient,
+    EnvironHessian,
+    EnvironSparseField,
+)
 from ..representations.functions import FunctionContainer, EnvironERFC
 from ..physical import EnvironElectrons, EnvironIons
 from ..cores import CoreContainer
 from . import EnvironBoundary
 
+# largest fraction of moved spheres updated incrementally
+INCREMENTAL_FRACTION = 0.5
+
 
 class IonicBoundary(EnvironBoundary):
     """docstring"""
@@ -60,6 +70,13 @@ class IonicBoundary(EnvironBoundary):
 
         self._set_soft_spheres()
 
+        # the product of the spheres is kept as the sum of their logarithms,
+        # with the (sparse) terms of the sum and the positions they are for
+        self.logswitch = EnvironDensity(self.grid, label=f"{label}_log")
+        self._factors: List[Optional[EnvironSparseField]] = \
+            [None] * len(self.soft_spheres)
+        self._positions: Optional[np.ndarray] = None
+
     def update(self) -> None:
         """docstring"""
 
@@ -99,45 +116,67 @@ class IonicBoundary(EnvironBoundary):
             raise ValueError("missing soft spheres")
 
         partial = EnvironGradient(self.grid)
-        partial[:] = self.soft_spheres[index].gradient
+        self.soft_spheres[index].local('loggradient').scatter_add(partial)
+        partial[:] *= np.exp(self.logswitch)
 
-        density = EnvironDensity(self.grid)
-        mask = [*range(len(self.soft_spheres))]
-        mask.remove(index)
-        density[mask] = self.soft_spheres[mask].density()
+        return partial
 
-        partial[:] *= density
+    def dboundary_dions_all(self, de_dboundary: EnvironDensity) -> ndarray:
+        """Forces on all ions in one pass.
 
-        return partial
+        The partial derivative with respect to an ion is the product of the
+        spheres times the log-gradient of its own sphere, which is only
+        nonzero on the transition shell of that sphere.
+        """
+
+        if len(self.soft_spheres) == 0:
+            raise ValueError("missing soft spheres")
+
+        weight = np.exp(self.logswitch).ravel()
+        weight *= np.ravel(de_dboundary)
+
+        forces = np.empty((3, len(self.soft_spheres)))
+        for i, sphere in enumerate(self.soft_spheres):
+            loggradient = sphere.local('loggradient')
+            forces[:, i] = loggradient.values @ weight[loggradient.indices]
+
+        return -forces * self.grid.dV
 
     def _build(self) -> None:
         """docstring"""
 
-        self.soft_spheres.reset_derivatives()
+        self._update_logswitch()
 
-        self.switch[:] = 1.0
+        np.exp(self.logswitch, out=self.switch, casting='same_kind')
+        self.switch.touch()
 
-        for sphere in self.soft_spheres:
-            self.switch[:] *= sphere.density
+        hessian = self._checkout_hessian()
 
-        if self.deriv_level == 3:
-            if self.solvent_aware:
-                hessian = self.hessian
-            else:
-                hessian = EnvironHessian(self.grid)
+        try:
+            if self.deriv_method == 'fft':
+                self._compute_derivatives_fft(self.switch, hessian)
+            elif self.deriv_method == 'lowmem':
 
-        if self.deriv_method == 'fft':
-            self._compute_derivatives_fft(self.switch, hessian)
-        elif self.deriv_method == 'lowmem':
+                if self.deriv_level >= 1:
+                    loggradient = self._sum_spheres(EnvironGradient, 'loggradient')
 
-            if self.deriv_level >= 1: self._compute_gradient()
+                    try:
+                        self._compute_gradient(loggradient)
 
-            if self.deriv_level == 2: self._compute_laplacian()
+                        if self.deriv_level == 2:
+                            self._compute_laplacian(loggradient)
 
-            if self.deriv_level == 3: self._compute_dsurface(hessian)
+                        if self.deriv_level == 3:
+                            self._compute_dsurface(loggradient, hessian)
 
-        else:
-            raise ValueError(f"{self.deriv_method} not supported")
+                    finally:
+                        self.cores.workspace.release(loggradient)
+
+            else:
+                raise ValueError(f"{self.deriv_method} not supported")
+
+        finally:
+            self._release_hessian(hessian)
 
         self.switch[:] = 1.0 - self.switch
         self.volume = self.switch.charge
@@ -154,66 +193,77 @@ class IonicBoundary(EnvironBoundary):
                 if self.solvent_aware:
                     hessian[:] *= -1
 
-    def _compute_gradient(self) -> None:
-        """docstring"""
-        self.gradient[:,:] = 0.
-        for sphere in self.soft_spheres:
-            mask = np.abs(sphere.density) > 1e-60
-            if not np.any(mask): continue
+    def _update_logswitch(self) -> None:
+        """Bring the sum of the sphere log-factors up to date.
 
-            self.gradient[:, mask] += sphere.gradient[:, mask] * \
-                                      self.switch[mask] / sphere.density[mask]
+        If only a few spheres moved since the last build, only those are
+        evaluated again, subtracting their old terms and adding new ones.
+        """
+        positions = np.array([sphere.pos for sphere in self.soft_spheres])
 
-    def _compute_laplacian(self) -> None:
-        """docstring"""
-        self.laplacian[:] = 0.
-        for sphere in self.soft_spheres:
-            mask = np.abs(sphere.density) > 1e-60
-            if not np.any(mask): continue
+        if self._positions is None or self.field_aware:
+            moved = np.arange(len(positions))
+        else:
+            changed = np.any(positions != self._positions, axis=1)
+            moved = np.flatnonzero(changed)
 
-            den = sphere.density[mask]
-            grad = sphere.gradient[:, mask]
-            lapl = sphere.laplacian[mask]
-            s = self.switch[mask]
+        if len(moved) > len(positions) * INCREMENTAL_FRACTION:
+            moved = np.arange(len(positions))
+            self.soft_spheres.reset_derivatives()
+            self.logswitch[:] = 0.
+        else:
+            for i in moved:
+                self._factors[i].scatter_add(self.logswitch, -1.)
+                self.soft_spheres.functions[i].reset_derivatives()
 
-            self.laplacian[mask] += lapl / den * s
-            self.laplacian[mask] -= np.sum(grad**2, 0) / den**2 * s
+        for i in moved:
+            factor = self.soft_spheres.functions[i].local('logdensity')
+            factor.scatter_add(self.logswitch)
+            self._factors[i] = factor
 
-            self.laplacian[mask] += \
-                np.sum(self.gradient[:, mask] * grad, 0) / den
+        self._positions = positions
 
-    def _compute_dsurface(self, hessian: EnvironHessian) -> None:
-        """docstring"""
-        for sphere in self.soft_spheres:
-            mask = np.abs(sphere.density) > 1e-60
-            if not np.any(mask): continue
+    def _sum_spheres(self, cls: type, name: str) -> EnvironField:
+        """Sum of a sphere quantity, in a field borrowed from the workspace."""
+        field = self.cores.workspace.checkout(cls, self.grid)
 
-            den = sphere.density[mask]
-            grad = sphere.gradient[:, mask]
-            hess = sphere.hessian[:, mask]
-            s = self.switch[mask]
+        try:
+            for sphere in self.soft_spheres:
+                sphere.local(name).scatter_add(field)
+        except BaseException:
+            self.cores.workspace.release(field)
+            raise
 
-            hessian[:, mask] += hess[:] / den * s
+        return field
 
-            shape = hessian[:, mask].shape
+    def _compute_gradient(self, loggradient: EnvironGradient) -> None:
+        """docstring"""
+        self.gradient[:] = loggradient * self.switch
 
-            hessian[:, mask] -= np.reshape(
-                np.einsum(
-                    'i...,j...->ij...',
-                    grad,
-                    grad,
-                ) / den**2 * s,
-                shape,
-            )
+    def _compute_laplacian(self, loggradient: EnvironGradient) -> None:
+        """docstring"""
+        self.laplacian[:] = 0.
+        for sphere in self.soft_spheres:
+            sphere.local('loglaplacian').scatter_add(self.laplacian)
 
-            hessian[:, mask] += np.reshape(
-                np.einsum(
-                    'i...,j...->ij...',
-                    self.gradient[:, mask],
-                    grad,
-                ) / den,
-                shape,
-            )
+        self.laplacian[:] += np.einsum('i...,i...', loggradient, loggradient)
+        self.laplacian[:] *= self.switch
+
+    def _compute_dsurface(
+        self,
+        loggradient: EnvironGradient,
+        hessian: EnvironHessian,
+    ) -> None:
+        """docstring"""
+        hessian[:] = 0.
+        for sphere in self.soft_spheres:
+            sphere.local('loghessian').scatter_add(hessian)
+
+        hessian[:] += np.reshape(
+            np.einsum('i...,j...->ij...', loggradient, loggradient),
+            hessian.shape,
+        )
+        hessian[:] *= self.switch
 
         self.laplacian = hessian.trace
         self.dsurface = self._calc_dsurface(self.gradient, hessian)
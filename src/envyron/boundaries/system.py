@@ -1,5 +1,9 @@
+from numpy import ndarray
+
+import numpy as np
+
 from ..domains import EnvironGrid
-from ..representations import EnvironGradient, EnvironHessian
+from ..representations import EnvironDensity, EnvironGradient
 from ..representations.functions import EnvironERFC
 from ..physical import EnvironSystem
 from ..cores import CoreContainer
@@ -66,32 +70,36 @@ class SystemBoundary(EnvironBoundary):
         """docstring"""
         return EnvironGradient(self.grid)
 
+    def dboundary_dions_all(self, de_dboundary: EnvironDensity) -> ndarray:
+        """docstring"""
+        return np.zeros((3, self.system.ions.count))
+
     def _build(self) -> None:
         """docstring"""
 
         self.switch[:] = self.simple.density
 
-        if self.deriv_level == 3:
-            if self.solvent_aware:
-                hessian = self.hessian
-            else:
-                hessian = EnvironHessian(self.grid)
+        hessian = self._checkout_hessian()
 
-        if self.deriv_method == 'fft':
-            self._compute_derivatives_fft(self.switch, hessian)
-        elif self.deriv_method == 'chain':
+        try:
+            if self.deriv_method == 'fft':
+                self._compute_derivatives_fft(self.switch, hessian)
+            elif self.deriv_method == 'chain':
 
-            if self.deriv_level >= 1: self.gradient[:] = self.simple.gradient
+                if self.deriv_level >= 1: self.gradient[:] = self.simple.gradient
 
-            if self.deriv_level == 2: self.laplacian[:] = self.simple.laplacian
+                if self.deriv_level == 2: self.laplacian[:] = self.simple.laplacian
 
-            if self.deriv_level == 3:
-                hessian[:] = self.simple.hessian
-                self.laplacian[:] = hessian.trace
-                self.dsurface[:] = self._calc_dsurface(self.gradient, hessian)
+                if self.deriv_level == 3:
+                    hessian[:] = self.simple.hessian
+                    self.laplacian[:] = hessian.trace
+                    self.dsurface[:] = self._calc_dsurface(self.gradient, hessian)
 
-        else:
-            raise ValueError(f"{self.deriv_method} not supported")
+            else:
+                raise ValueError(f"{self.deriv_method} not supported")
+
+        finally:
+            self._release_hessian(hessian)
 
         self.volume = self.switch.charge
 
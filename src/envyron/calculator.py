@@ -1,7 +1,7 @@
 from numpy import ndarray
 
 from envyron import Main
-from envyron.representations import EnvironDensity
+from envyron.representations import EnvironDensity, EnvironField
 from envyron.boundaries import ElectronicBoundary
 
 
@@ -33,6 +33,9 @@ class Calculator:
             # environment calculation
             self.main.velectrostatic = self.main.setup.outer.solve(
                 self.main.charges)
+            # the potential is differentiated repeatedly below
+            if isinstance(self.main.velectrostatic, EnvironField):
+                self.main.velectrostatic.cache_reciprocal = True
             # dvtot
             self.main.dvtot[:] = self.main.velectrostatic[:] - self.main.vreference[:]
             # compute charges that depends on potential
@@ -65,7 +68,8 @@ class Calculator:
                     self.main.solvent.calc_solvent_aware_de_dboundary(
                         de_dboundary)
                 if type(self.main.solvent) == ElectronicBoundary:
-                    self.main.vsoftcavity = de_dboundary * self.main.solvent.dswitch
+                    self.main.solvent.calc_vsoftcavity(de_dboundary,
+                                                       self.main.vsoftcavity)
             if self.main.setup.lsoftelectrolyte:
                 de_dboundary[:] = 0.
 
@@ -1,4 +1,6 @@
 from .core import NumericalCore
+from .workspace import WorkspacePool
 from .container import CoreContainer
 from .analytic_1d import Analytic1DCore
+from .backends import FFTBackend, get_fft_backend
 from .fft import FFTCore
@@ -0,0 +1,218 @@
+from typing import Any, Dict, Optional, Sequence, Tuple
+from numpy import ndarray
+
+import os
+import pickle
+import numpy as np
+import scipy.fft
+from abc import ABC, abstractmethod
+
+try:
+    import pyfftw
+except ImportError:
+    pyfftw = None
+
+# spatial axes of (stacked) grid arrays
+AXES = (-3, -2, -1)
+
+
+class FFTBackend(ABC):
+    """Library used by the FFT core to transform over the spatial axes."""
+
+    def __init__(self, threads: int = 1) -> None:
+        self.threads = threads
+
+    @property
+    def threads(self) -> int:
+        """docstring"""
+        return self.__threads
+
+    @threads.setter
+    def threads(self, threads: int) -> None:
+        """docstring"""
+        if threads < 0: raise ValueError("number of threads must be >= 0")
+        self.__threads = threads or os.cpu_count() or 1
+
+    @abstractmethod
+    def rfftn(self, data: ndarray) -> ndarray:
+        """docstring"""
+
+    @abstractmethod
+    def irfftn(
+        self,
+        data_g: ndarray,
+        shape: Sequence[int],
+        out: Optional[ndarray] = None,
+    ) -> ndarray:
+        """docstring"""
+
+    @abstractmethod
+    def fftn(self, data: ndarray) -> ndarray:
+        """docstring"""
+
+    @abstractmethod
+    def ifftn(self, data_g: ndarray) -> ndarray:
+        """docstring"""
+
+
+class NumpyBackend(FFTBackend):
+    """Single-threaded numpy.fft transforms."""
+
+    def rfftn(self, data: ndarray) -> ndarray:
+        """docstring"""
+        return np.fft.rfftn(data, axes=AXES)
+
+    def irfftn(
+        self,
+        data_g: ndarray,
+        shape: Sequence[int],
+        out: Optional[ndarray] = None,
+    ) -> ndarray:
+        """docstring"""
+        return _store(np.fft.irfftn(data_g, s=tuple(shape), axes=AXES), out)
+
+    def fftn(self, data: ndarray) -> ndarray:
+        """docstring"""
+        return np.fft.fftn(data, axes=AXES)
+
+    def ifftn(self, data_g: ndarray) -> ndarray:
+        """docstring"""
+        return np.fft.ifftn(data_g, axes=AXES)
+
+
+class ScipyBackend(FFTBackend):
+    """Multi-threaded scipy.fft transforms."""
+
+    def rfftn(self, data: ndarray) -> ndarray:
+        """docstring"""
+        return scipy.fft.rfftn(data, axes=AXES, workers=self.threads)
+
+    def irfftn(
+        self,
+        data_g: ndarray,
+        shape: Sequence[int],
+        out: Optional[ndarray] = None,
+    ) -> ndarray:
+        """docstring"""
+        data = scipy.fft.irfftn(
+            data_g,
+            s=tuple(shape),
+            axes=AXES,
+            workers=self.threads,
+        )
+        return _store(data, out)
+
+    def fftn(self, data: ndarray) -> ndarray:
+        """docstring"""
+        return scipy.fft.fftn(data, axes=AXES, workers=self.threads)
+
+    def ifftn(self, data_g: ndarray) -> ndarray:
+        """docstring"""
+        return scipy.fft.ifftn(data_g, axes=AXES, workers=self.threads)
+
+
+class PyFFTWBackend(FFTBackend):
+    """Multi-threaded FFTW transforms with reusable plans.
+
+    One plan is created for every (transform, shape, dtype) and reused
+    for all later calls. If a wisdom file is given, it is imported at
+    construction and updated whenever a new plan is created.
+    """
+
+    def __init__(
+        self,
+        threads: int = 1,
+        planner_effort: str = 'FFTW_MEASURE',
+        wisdom_file: Optional[str] = None,
+    ) -> None:
+        if pyfftw is None: raise ValueError("pyFFTW is not installed")
+        super().__init__(threads)
+        self.planner_effort = planner_effort
+        self.wisdom_file = wisdom_file
+        self._plans: Dict[Tuple[Any, ...], Any] = {}
+        self._import_wisdom()
+
+    def rfftn(self, data: ndarray) -> ndarray:
+        """docstring"""
+        return self._execute('rfftn', data)
+
+    def irfftn(
+        self,
+        data_g: ndarray,
+        shape: Sequence[int],
+        out: Optional[ndarray] = None,
+    ) -> ndarray:
+        """docstring"""
+        return self._execute('irfftn', data_g, tuple(shape), out)
+
+    def fftn(self, data: ndarray) -> ndarray:
+        """docstring"""
+        return self._execute('fftn', data)
+
+    def ifftn(self, data_g: ndarray) -> ndarray:
+        """docstring"""
+        return self._execute('ifftn', data_g)
+
+    def _execute(
+        self,
+        kind: str,
+        data: ndarray,
+        shape: Optional[Tuple[int, ...]] = None,
+        out: Optional[ndarray] = None,
+    ) -> ndarray:
+        """Run the cached plan for this transform, creating it if needed."""
+        key = (kind, data.shape, data.dtype, shape)
+
+        plan = self._plans.get(key)
+
+        if plan is None:
+            kwargs = {'s': shape} if shape is not None else {}
+            plan = getattr(pyfftw.builders, kind)(
+                pyfftw.empty_aligned(data.shape, dtype=data.dtype),
+                axes=AXES,
+                threads=self.threads,
+                planner_effort=self.planner_effort,
+                **kwargs,
+            )
+            self._plans[key] = plan
+            self._export_wisdom()
+
+        # plans reuse their output buffer, so hand out a copy
+        if out is None: return plan(data).copy()
+        return _store(plan(data), out)
+
+    def _import_wisdom(self) -> None:
+        """docstring"""
+        if self.wisdom_file is None or not os.path.exists(self.wisdom_file):
+            return
+
+        with open(self.wisdom_file, 'rb') as f:
+            pyfftw.import_wisdom(pickle.load(f))
+
+    def _export_wisdom(self) -> None:
+        """docstring"""
+        if self.wisdom_file is None: return
+
+        with open(self.wisdom_file, 'wb') as f:
+            pickle.dump(pyfftw.export_wisdom(), f)
+
+
+def _store(data: ndarray, out: Optional[ndarray]) -> ndarray:
+    """Copy a transform into `out` (if given) and return the result."""
+    if out is None: return data
+    np.copyto(out, data, casting='same_kind')
+    return out
+
+
+BACKENDS = {
+    'numpy': NumpyBackend,
+    'scipy': ScipyBackend,
+    'pyfftw': PyFFTWBackend,
+}
+
+
+def get_fft_backend(name: str, threads: int = 1, **kwargs: Any) -> FFTBackend:
+    """Instantiate an FFT backend by name."""
+    if name not in BACKENDS:
+        raise ValueError(f"{name} is not a supported FFT backend")
+    return BACKENDS[name](threads, **kwargs)
@@ -1,6 +1,7 @@
 from typing import Optional
 
 from .core import NumericalCore
+from .workspace import WorkspacePool
 
 
 class CoreContainer:
@@ -13,10 +14,14 @@ class CoreContainer:
         derivatives_core: Optional[NumericalCore] = None,
         electrostatics_core: Optional[NumericalCore] = None,
         corrections_core: Optional[NumericalCore] = None,
+        workspace: Optional[WorkspacePool] = None,
     ) -> None:
         self.label = label
         self.has_internal_correction = has_internal_correction
 
+        # temporary fields, possibly shared with other containers
+        self.workspace = workspace or WorkspacePool()
+
         self._derivatives = None
         self.has_derivatives = False
 
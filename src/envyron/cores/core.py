@@ -1,11 +1,18 @@
+from typing import Collection, Dict, Optional
 from numpy import ndarray
 
+import numpy as np
 from abc import ABC
 
 from multimethod import multimethod
 
 from ..domains import EnvironGrid
-from ..representations import EnvironDensity, EnvironGradient, EnvironHessian
+from ..representations import (
+    EnvironField,
+    EnvironDensity,
+    EnvironGradient,
+    EnvironHessian,
+)
 from ..representations.functions import FunctionContainer
 
 
@@ -14,20 +21,46 @@ class NumericalCore(ABC):
 
     def __init__(self, grid: EnvironGrid) -> None:
         self.grid = grid
+        self.dtype: np.dtype = np.dtype(np.float64)
 
-    def gradient(self, density: EnvironDensity) -> EnvironGradient:
+    def gradient(
+        self,
+        density: EnvironDensity,
+        out: Optional[EnvironGradient] = None,
+    ) -> EnvironGradient:
         """docstring"""
         raise NotImplementedError()
 
-    def divergence(self, gradient: EnvironGradient) -> EnvironDensity:
+    def divergence(
+        self,
+        gradient: EnvironGradient,
+        out: Optional[EnvironDensity] = None,
+    ) -> EnvironDensity:
         """docstring"""
         raise NotImplementedError()
 
-    def laplacian(self, density: EnvironDensity) -> EnvironDensity:
+    def laplacian(
+        self,
+        density: EnvironDensity,
+        out: Optional[EnvironDensity] = None,
+    ) -> EnvironDensity:
         """docstring"""
         raise NotImplementedError()
 
-    def hessian(self, density: EnvironDensity) -> EnvironGradient:
+    def hessian(
+        self,
+        density: EnvironDensity,
+        out: Optional[EnvironHessian] = None,
+    ) -> EnvironHessian:
+        """docstring"""
+        raise NotImplementedError()
+
+    def derivatives(
+        self,
+        density: EnvironDensity,
+        levels: Collection[str] = ('gradient', ),
+        out: Optional[Dict[str, EnvironField]] = None,
+    ) -> Dict[str, EnvironField]:
         """docstring"""
         raise NotImplementedError()
 
@@ -36,6 +69,7 @@ class NumericalCore(ABC):
         self,
         density: EnvironDensity,
         other_density: EnvironDensity,
+        out: Optional[EnvironDensity] = None,
     ) -> EnvironDensity:
         """docstring"""
         raise NotImplementedError()
@@ -45,6 +79,7 @@ class NumericalCore(ABC):
         self,
         density: EnvironDensity,
         gradient: EnvironGradient,
+        out: Optional[EnvironGradient] = None,
     ) -> EnvironGradient:
         """docstring"""
         raise NotImplementedError()
@@ -54,15 +89,24 @@ class NumericalCore(ABC):
         self,
         density: EnvironDensity,
         hessian: EnvironHessian,
+        out: Optional[EnvironHessian] = None,
     ) -> EnvironHessian:
         """docstring"""
         raise NotImplementedError()
 
-    def poisson(self, rho: EnvironDensity) -> EnvironDensity:
+    def poisson(
+        self,
+        rho: EnvironDensity,
+        out: Optional[EnvironDensity] = None,
+    ) -> EnvironDensity:
         """docstring"""
         raise NotImplementedError()
 
-    def grad_poisson(self, rho: EnvironDensity) -> EnvironGradient:
+    def grad_poisson(
+        self,
+        rho: EnvironDensity,
+        out: Optional[EnvironGradient] = None,
+    ) -> EnvironGradient:
         """docstring"""
         raise NotImplementedError()
 
@@ -1,200 +1,582 @@
+from typing import Collection, Dict, Optional, Type, TypeVar
 from numpy import ndarray
+from numpy.typing import DTypeLike
 
 import numpy as np
 
 from multimethod import multimethod
 
 from ..cores import NumericalCore
+from .backends import FFTBackend, NumpyBackend
 
 from ..domains import EnvironGrid
-from ..representations import EnvironDensity, EnvironGradient, EnvironHessian
-from ..representations.functions import FunctionContainer
+from ..representations import (
+    EnvironField,
+    EnvironDensity,
+    EnvironGradient,
+    EnvironHessian,
+)
+from ..representations.functions import (
+    EnvironFunction,
+    FunctionContainer,
+    FUNC_TOL,
+)
 from ..utils.constants import FPI, EPS8
 
-from dftpy.field import DirectField, ReciprocalField
+# concrete field types produced by the operations
+Field = TypeVar('Field', EnvironDensity, EnvironGradient, EnvironHessian)
+
+# independent (i, j) pairs of the symmetric Hessian kernel
+HESSIAN_PAIRS = ((0, 0), (0, 1), (0, 2), (1, 1), (1, 2), (2, 2))
+
+# position of each of the 9 Hessian components in the 6 independent ones
+HESSIAN_INDICES = (0, 1, 2, 1, 3, 4, 2, 4, 5)
 
 
 class FFTCore(NumericalCore):
     """docstring"""
 
-    def __init__(self, grid: EnvironGrid) -> None:
+    def __init__(
+        self,
+        grid: EnvironGrid,
+        kernel_budget: Optional[int] = None,
+        rfft: bool = True,
+        backend: Optional[FFTBackend] = None,
+        dtype: DTypeLike = np.float64,
+    ) -> None:
         super().__init__(grid)
-        self.reciprocal_grid = grid.get_reciprocal()
+        self.dtype = np.dtype(dtype)
+        self.cdtype = np.result_type(self.dtype, np.complex64)
+        self.kernel_budget = kernel_budget
+        self.rfft = rfft
+        self.backend = backend or NumpyBackend()
+        self._kernels: Dict[str, ndarray] = {}
+        self.update_cell()
+
+    @property
+    def kernel_nbytes(self) -> int:
+        """Memory (in bytes) held by the cached reciprocal-space kernels."""
+        return sum(kernel.nbytes for kernel in self._kernels.values())
+
+    def update_cell(self) -> None:
+        """Rebuild the reciprocal grid and drop all cached kernels."""
+        self._lattice = np.array(self.grid.lattice)
+        self.reciprocal_grid = self.grid.get_reciprocal(scale=np.ones(3))
+        self._set_reciprocal_vectors()
+        self.reset_kernels()
+
+    def reset_kernels(self) -> None:
+        """Drop all cached reciprocal-space kernels."""
+        self._kernels.clear()
+
+    def _set_reciprocal_vectors(self) -> None:
+        """Compute G and G^2 in the layout used by the transforms.
+
+        In rfft mode only the non-negative half of the last axis is kept.
+        """
+        nr = self.grid.nrR
+
+        freqs = [np.fft.fftfreq(n, 1. / n) for n in nr[:2]]
+
+        if self.rfft:
+            freqs.append(np.fft.rfftfreq(nr[2], 1. / nr[2]))
+        else:
+            freqs.append(np.fft.fftfreq(nr[2], 1. / nr[2]))
+
+        # miller indices along each axis, for separable phase factors
+        self.miller = freqs
+
+        miller = np.array(np.meshgrid(*freqs, indexing='ij'))
+        bg = self.reciprocal_grid.lattice
+
+        self.g = np.einsum('i...,ik->k...', miller, bg)
+        self.gg = np.einsum('i...,i...', self.g, self.g)
+
+    def _check_cell(self) -> None:
+        """Invalidate cached kernels if the cell has changed."""
+        if not np.array_equal(self._lattice, self.grid.lattice):
+            self.update_cell()
+
+    def _kernel(self, name: str) -> ndarray:
+        """Return a reciprocal-space kernel, building it if not cached.
+
+        Kernels that would exceed the memory budget are rebuilt on every
+        request rather than stored.
+        """
+        self._check_cell()
+
+        kernel = self._kernels.get(name)
+
+        if kernel is None:
+            kernel = getattr(self, f"_build_{name}_kernel")()
+
+            if np.iscomplexobj(kernel):
+                kernel = kernel.astype(self.cdtype, copy=False)
+            else:
+                kernel = kernel.astype(self.dtype, copy=False)
+
+            budget = self.kernel_budget
+            if budget is None or self.kernel_nbytes + kernel.nbytes <= budget:
+                self._kernels[name] = kernel
+
+        return kernel
+
+    def _build_coulomb_kernel(self) -> ndarray:
+        """4 pi / G^2, with the G = 0 term set to zero."""
+        mask = self.gg > EPS8
+        kernel = np.zeros(self.gg.shape)
+        kernel[mask] = FPI / self.gg[mask]
+        return kernel
+
+    def _build_gradient_kernel(self) -> ndarray:
+        """i G"""
+        return self.g * 1j
+
+    def _build_laplacian_kernel(self) -> ndarray:
+        """-G^2"""
+        return -self.gg
+
+    def _build_hessian_kernel(self) -> ndarray:
+        """-G_i G_j for the 6 independent components."""
+        g = self.g
+        return -np.array([g[i] * g[j] for i, j in HESSIAN_PAIRS])
+
+    def _build_weights_kernel(self) -> ndarray:
+        """Multiplicity of each G vector in sums over the full spectrum.
+
+        In rfft mode, G vectors of the stored half stand for their (not
+        stored) opposites as well, except on the last axis' 0 and Nyquist
+        planes.
+        """
+        weights = np.ones(self.gg.shape)
+        if self.rfft:
+            n = self.grid.nrR[2]
+            weights[..., 1:(n + 1) // 2] = 2.
+        return weights
 
-    def gradient(self, density: EnvironDensity) -> EnvironGradient:
-        """docstring"""
-        density_g = density.fft()
+    def _forward(self, data: ndarray) -> ndarray:
+        """Forward transform of a real field (or stack of fields).
 
-        data = self.reciprocal_grid.g * density_g * 1j
+        Stacked fields are transformed together in a single batched call.
+        Fields that opted into `cache_reciprocal` are only transformed
+        again after being modified.
+        """
+        if isinstance(data, EnvironField):
+            data_g = data.get_reciprocal(self)
+            if data_g is not None: return data_g
 
-        gradient_g = ReciprocalField(
-            self.reciprocal_grid,
-            rank=3,
-            griddata_3d=data,
-        )
+        array = np.asarray(data, dtype=self.dtype)
+
+        if self.rfft:
+            data_g = self.backend.rfftn(array)
+        else:
+            data_g = self.backend.fftn(array)
+
+        data_g = data_g.astype(self.cdtype, copy=False)
+
+        if isinstance(data, EnvironField): data.set_reciprocal(self, data_g)
+
+        return data_g
+
+    def _backward(
+        self,
+        data_g: ndarray,
+        out: Optional[ndarray] = None,
+    ) -> ndarray:
+        """Inverse transform back to a real field (or stack of fields).
+
+        Stacked fields are transformed together in a single batched call.
+        If given, the result is written into `out`.
+        """
+        if self.rfft:
+            data = self.backend.irfftn(data_g, self.grid.nrR, out)
+        else:
+            data = self.backend.ifftn(data_g).real
+
+        if out is None: return data.astype(self.dtype, copy=False)
+
+        return self._store(data, out)
+
+    def _field(
+        self,
+        cls: Type[Field],
+        data: ndarray,
+        label: str,
+        out: Optional[Field] = None,
+    ) -> Field:
+        """Wrap the result of an operation, or store it in `out`."""
+        if out is None: return cls(self.grid, data, label)
+        self._store(data, out)
+        return out
+
+    @staticmethod
+    def _store(data: ndarray, out: ndarray) -> ndarray:
+        """Copy data into a preallocated buffer (if not already there)."""
+        if data is not out: np.copyto(out, data, casting='same_kind')
+        if isinstance(out, EnvironField): out.touch()
+        return out
+
+    def _expand_hessian(
+        self,
+        data: ndarray,
+        out: Optional[EnvironHessian] = None,
+    ) -> ndarray:
+        """Expand the 6 independent Hessian components to all 9."""
+        if out is None: return data[HESSIAN_INDICES, ...]
+
+        for i, j in enumerate(HESSIAN_INDICES):
+            np.copyto(out[i], data[j], casting='same_kind')
+
+        return self._store(out, out)
+
+    def gradient(
+        self,
+        density: EnvironDensity,
+        out: Optional[EnvironGradient] = None,
+    ) -> EnvironGradient:
+        """docstring"""
+        density_g = self._forward(density)
+
+        data = self._kernel('gradient') * density_g
 
-        gradient = gradient_g.ifft(force_real=True)
-        return EnvironGradient(self.grid, gradient, 'gradient')
+        gradient = self._backward(data, out)
+        return self._field(EnvironGradient, gradient, 'gradient', out)
 
-    def divergence(self, gradient: EnvironGradient) -> EnvironDensity:
+    def divergence(
+        self,
+        gradient: EnvironGradient,
+        out: Optional[EnvironDensity] = None,
+    ) -> EnvironDensity:
         """docstring"""
-        gradient_g = gradient.fft()
+        gradient_g = self._forward(gradient)
 
         data = np.einsum(
             'l...,l...',
-            self.reciprocal_grid.g,
+            self._kernel('gradient'),
             gradient_g,
-        ) * 1j
-
-        divergence_g = ReciprocalField(
-            self.reciprocal_grid,
-            griddata_3d=data,
         )
 
-        divergence = divergence_g.ifft(force_real=True)
-        return EnvironDensity(self.grid, divergence, 'divergence')
+        divergence = self._backward(data, out)
+        return self._field(EnvironDensity, divergence, 'divergence', out)
 
-    def laplacian(self, density: EnvironDensity) -> EnvironDensity:
+    def laplacian(
+        self,
+        density: EnvironDensity,
+        out: Optional[EnvironDensity] = None,
+    ) -> EnvironDensity:
         """docstring"""
-        density_g = density.fft()
+        density_g = self._forward(density)
 
-        data = -self.reciprocal_grid.gg * density_g
+        data = self._kernel('laplacian') * density_g
 
-        laplacian_g = ReciprocalField(
-            self.reciprocal_grid,
-            griddata_3d=data,
-        )
+        laplacian = self._backward(data, out)
+        return self._field(EnvironDensity, laplacian, 'laplacian', out)
 
-        laplacian = laplacian_g.ifft(force_real=True)
-        return EnvironDensity(self.grid, laplacian, 'laplacian')
-
-    def hessian(self, density: EnvironDensity) -> EnvironHessian:
+    def hessian(
+        self,
+        density: EnvironDensity,
+        out: Optional[EnvironHessian] = None,
+    ) -> EnvironHessian:
         """docstring"""
-        density_g = density.fft()
+        density_g = self._forward(density)
+
+        data = self._kernel('hessian') * density_g
+
+        hessian = self._expand_hessian(self._backward(data), out)
+        return self._field(EnvironHessian, hessian, 'hessian', out)
+
+    def derivatives(
+        self,
+        density: EnvironDensity,
+        levels: Collection[str] = ('gradient', ),
+        out: Optional[Dict[str, EnvironField]] = None,
+    ) -> Dict[str, EnvironField]:
+        """Compute several derivatives of a density from one forward FFT.
+
+        `levels` may include 'gradient', 'modulus' (of the gradient),
+        'laplacian' and 'hessian'. All requested fields are obtained from
+        a single batched inverse transform. If the Hessian is requested,
+        the laplacian is taken as its trace at no extra cost. Fields found
+        in `out` are filled in place instead of being allocated.
+        """
+        unknown = set(levels) - {'gradient', 'modulus', 'laplacian', 'hessian'}
+        if unknown: raise ValueError(f"unexpected derivative levels {unknown}")
+
+        out = out or {}
+
+        need_gradient = 'gradient' in levels or 'modulus' in levels
+        need_hessian = 'hessian' in levels
+        need_laplacian = 'laplacian' in levels and not need_hessian
 
-        hessian_g: np.ndarray = -np.einsum(
-            'i...,j...->ji...',
-            self.reciprocal_grid.g,
-            self.reciprocal_grid.g,
-        ) * density_g
+        density_g = self._forward(density)
 
-        hessian_g = hessian_g.reshape(9, *self.grid.nr)
+        kernels = []
+        if need_gradient: kernels.append(self._kernel('gradient'))
+        if need_hessian: kernels.append(self._kernel('hessian'))
+        if need_laplacian: kernels.append(self._kernel('laplacian')[None])
+
+        if not kernels: return {}
+
+        data = self._backward(np.concatenate(kernels) * density_g)
+
+        derivatives: Dict[str, EnvironField] = {}
+
+        if need_gradient:
+            gradient = self._field(
+                EnvironGradient,
+                data[:3],
+                'gradient',
+                out.get('gradient'),
+            )
+            data = data[3:]
 
-        hessian = EnvironHessian(self.grid, label='hessian')
+            if 'gradient' in levels: derivatives['gradient'] = gradient
+            if 'modulus' in levels: derivatives['modulus'] = gradient.modulus
 
-        for ipol in np.arange(9):
-            aux_g = ReciprocalField(
-                self.reciprocal_grid,
-                griddata_3d=hessian_g[ipol, :, :, :],
+        if need_hessian:
+            hessian = self._field(
+                EnvironHessian,
+                self._expand_hessian(data, out.get('hessian')),
+                'hessian',
+                out.get('hessian'),
+            )
+            derivatives['hessian'] = hessian
+
+            if 'laplacian' in levels:
+                derivatives['laplacian'] = self._field(
+                    EnvironDensity,
+                    hessian.trace,
+                    'laplacian',
+                    out.get('laplacian'),
+                )
+
+        if need_laplacian:
+            derivatives['laplacian'] = self._field(
+                EnvironDensity,
+                data[0],
+                'laplacian',
+                out.get('laplacian'),
             )
-            hessian[ipol, :, :, :] = aux_g.ifft(force_real=True)
 
-        return hessian
+        return derivatives
 
     @multimethod
     def convolution(
         self,
         density_a: EnvironDensity,
         density_b: EnvironDensity,
+        out: Optional[EnvironDensity] = None,
     ) -> EnvironDensity:
         """docstring"""
-        density_a_g = density_a.fft()
-        density_b_g = density_b.fft()
+        density_a_g = self._forward(density_a)
+        density_b_g = self._forward(density_b)
 
         data = density_a_g * density_b_g
-
-        convolution_density_g = ReciprocalField(
-            self.reciprocal_grid,
-            griddata_3d=data,
+        data *= self.grid.dV
+
+        convolution_density = self._backward(data, out)
+        return self._field(
+            EnvironDensity,
+            convolution_density,
+            'convolution_density',
+            out,
         )
 
-        convolution_density = convolution_density_g.iff(force_real=True)
-        return convolution_density
-
     @multimethod
     def convolution(
         self,
         density: EnvironDensity,
         gradient: EnvironGradient,
+        out: Optional[EnvironGradient] = None,
     ) -> EnvironGradient:
         """docstring"""
-        density_g = density.fft()
-        gradient_g = gradient.fft()
+        density_g = self._forward(density)
+        gradient_g = self._forward(gradient)
 
         data = density_g * gradient_g
-
-        convolution_gradient_g = ReciprocalField(
-            self.reciprocal_grid,
-            rank=3,
-            griddata_3d=data,
+        data *= self.grid.dV
+
+        convolution_gradient = self._backward(data, out)
+        return self._field(
+            EnvironGradient,
+            convolution_gradient,
+            'convolution_gradient',
+            out,
         )
 
-        convolution_gradient = convolution_gradient_g.iff(force_real=True)
-        return convolution_gradient
-
     @multimethod
     def convolution(
         self,
         density: EnvironDensity,
         hessian: EnvironHessian,
+        out: Optional[EnvironHessian] = None,
     ) -> EnvironHessian:
         """docstring"""
-        density_g = density.fft()
-
-        convolution_hessian = EnvironHessian(
-            self.grid,
-            label='convolution_hessian',
+        density_g = self._forward(density)
+
+        # symmetric hessians only need their 6 independent components
+        symmetric = _is_symmetric(hessian)
+
+        if symmetric:
+            hessian_g = self._forward(
+                hessian[[3 * i + j for i, j in HESSIAN_PAIRS], ...])
+        else:
+            hessian_g = self._forward(hessian)
+
+        data = hessian_g * density_g
+        data *= self.grid.dV
+
+        if symmetric:
+            convolution_hessian = self._expand_hessian(self._backward(data), out)
+        else:
+            convolution_hessian = self._backward(data, out)
+
+        return self._field(
+            EnvironHessian,
+            convolution_hessian,
+            'convolution_hessian',
+            out,
         )
 
-        for ipol in np.arange(9):
-            aux = DirectField(
-                self.grid,
-                griddata_3d=hessian[ipol, :, :, :],
-            )
-            aux_g = aux.fft() * density_g
-            convolution_hessian[ipol, :, :, :] = aux_g.ifft(force_real=True)
+    def poisson(
+        self,
+        density: EnvironDensity,
+        out: Optional[EnvironDensity] = None,
+    ) -> EnvironDensity:
+        """docstring"""
+        density_g = self._forward(density)
+
+        data = self._kernel('coulomb') * density_g
 
-        return convolution_hessian
+        poisson = self._backward(data, out)
+        return self._field(EnvironDensity, poisson, 'poisson', out)
 
-    def poisson(self, density: EnvironDensity) -> EnvironDensity:
+    def grad_poisson(
+        self,
+        density: EnvironDensity,
+        out: Optional[EnvironGradient] = None,
+    ) -> EnvironGradient:
         """docstring"""
-        density_g = density.fft()
+        density_g = self._forward(density)
 
-        rec = self.reciprocal_grid
+        data = self._kernel('gradient') * (self._kernel('coulomb') * density_g)
 
-        mask = rec.gg < EPS8
+        grad_poisson = self._backward(data, out)
+        return self._field(EnvironGradient, grad_poisson, 'grad_poisson', out)
 
-        data = np.zeros(rec.gg.shape)
-        data[mask] = FPI * density_g[mask] / rec.gg[mask]
+    def structure_factor(self, positions: ndarray) -> ndarray:
+        """sum_i exp(-i G.R_i) over a set of positions.
 
-        poisson_g = ReciprocalField(rec, griddata_3d=data)
+        The phase factors are separable along the reciprocal lattice
+        vectors, so each position costs one product of three 1D arrays.
+        """
+        self._check_cell()
 
-        poisson = poisson_g.ifft(force_real=True)
-        return poisson
+        structure_factor = np.zeros(self.gg.shape, dtype=complex)
 
-    def grad_poisson(self, density: EnvironDensity) -> EnvironGradient:
-        """docstring"""
-        density_g = density.fft()
+        for position in np.reshape(positions, (-1, 3)):
+            structure_factor += self._phase(position)
 
-        rec = self.reciprocal_grid
+        return structure_factor.astype(self.cdtype, copy=False)
 
-        mask = rec.gg < EPS8
+    def gaussians(
+        self,
+        functions: FunctionContainer,
+        out: Optional[EnvironDensity] = None,
+    ) -> EnvironDensity:
+        """Sum of point-like gaussians, built in reciprocal space.
 
-        data = np.zeros(rec.g.shape)
-        data[mask] = FPI * 1j * density_g[mask] * rec.g[:, mask] / rec.gg[mask]
+        Gaussians sharing spread and charge are added through their
+        structure factor, with a single inverse transform overall.
+        """
+        data = self._backward(self._gaussians_g(functions), out)
+        return self._field(EnvironDensity, data, 'gaussians', out)
 
-        grad_poisson_g = ReciprocalField(
-            rec,
-            rank=3,
-            griddata_3d=data,
-        )
+    def displace_gaussians(
+        self,
+        functions: FunctionContainer,
+        positions: ndarray,
+        out: EnvironDensity,
+    ) -> EnvironDensity:
+        """Update a sum of gaussians (see `gaussians`) for moved functions.
+
+        The contributions of the given functions at their previous
+        `positions` are replaced with the ones at their current positions.
+        """
+        data_g = np.zeros(self.gg.shape, dtype=self.cdtype)
+
+        for function, position in zip(functions, positions):
+            if function.spread <= FUNC_TOL: continue
+            shift = self._phase(function.pos) - self._phase(position)
+            data_g += self._form_factor(function) * shift
 
-        grad_poisson = grad_poisson_g.ifft(force_real=True)
-        return grad_poisson
+        out += self._backward(data_g / self.grid.dV)
+        return out
+
+    def grad_gaussians(
+        self,
+        functions: FunctionContainer,
+        out: Optional[EnvironGradient] = None,
+    ) -> EnvironGradient:
+        """Gradient of a sum of point-like gaussians (see `gaussians`)."""
+        data_g = self._kernel('gradient') * self._gaussians_g(functions)
+        data = self._backward(data_g, out)
+        return self._field(EnvironGradient, data, 'grad_gaussians', out)
 
     def force(self, rho: EnvironDensity, ions: FunctionContainer) -> ndarray:
-        """docstring"""
-        raise NotImplementedError()
+        """Forces on point-like gaussian ions from the potential of rho.
+
+        F_i = -d/dR_i int v(r) n_i(r - R_i) dr, with v = poisson(rho),
+        evaluated in reciprocal space. Returns an array of shape (nions, 3).
+        """
+        potential_g = self._kernel('coulomb') * self._forward(rho)
+        potential_g = np.conj(potential_g) * self._kernel('weights')
+
+        g = self.g.reshape(3, -1)
+
+        force = np.zeros((len(ions.functions), 3))
+
+        for i, ion in enumerate(ions):
+            form = self._form_factor(ion) * self._phase(ion.pos)
+            force[i] = g @ np.imag(potential_g * form).ravel()
+
+        # Re(i z) = -Im(z)
+        return -force / self.grid.nnrR
+
+    def _gaussians_g(self, functions: FunctionContainer) -> ndarray:
+        """Transform (in the convention of `_forward`) of a gaussian sum."""
+        groups: Dict[tuple, list] = {}
+        for function in functions:
+            # vanishing spreads (e.g. of hydrogen cores) do not show on grids
+            if function.spread <= FUNC_TOL: continue
+            key = (function.spread, function.volume)
+            groups.setdefault(key, []).append(function)
+
+        data_g = np.zeros(self.gg.shape, dtype=self.cdtype)
+
+        for group in groups.values():
+            positions = np.array([function.pos for function in group])
+            data_g += self._form_factor(group[0]) * \
+                      self.structure_factor(positions)
+
+        return data_g / self.grid.dV
+
+    def _form_factor(self, function: EnvironFunction) -> ndarray:
+        """Transform of a normalized point-like gaussian times its charge."""
+        if function.kind != 1 or function.dim != 0:
+            raise ValueError("only point-like gaussians are supported")
+        return function.volume * np.exp(-self.gg * function.spread**2 / 4)
+
+    def _phase(self, position: ndarray) -> ndarray:
+        """exp(-i G.R), as a product of phases along each lattice vector."""
+        position_s = np.linalg.solve(self.grid.lattice.T, position)
+        phases = [
+            np.exp(-2j * np.pi * m * s)
+            for m, s in zip(self.miller, position_s)
+        ]
+        return phases[0][:, None, None] * \
+               phases[1][None, :, None] * \
+               phases[2][None, None, :]
 
     def hess_v_h_of_rho_r(self, rho: ndarray) -> ndarray:
         """docstring"""
@@ -203,3 +585,10 @@ class FFTCore(NumericalCore):
     def field_of_grad_rho(self, grad_rho: ndarray) -> ndarray:
         """docstring"""
         raise NotImplementedError()
+
+
+def _is_symmetric(hessian: EnvironHessian) -> bool:
+    """Check whether a Hessian field is exactly symmetric."""
+    return all(
+        np.array_equal(hessian[3 * i + j], hessian[3 * j + i])
+        for i, j in HESSIAN_PAIRS if i != j)
@@ -0,0 +1,87 @@
+from typing import Dict, List, Tuple, Type
+from numpy.typing import DTypeLike
+
+import numpy as np
+
+from ..domains import EnvironGrid
+from ..representations import EnvironField
+
+
+class WorkspacePool:
+    """Pool of reusable full-grid fields for temporary storage.
+
+    Fields are checked out for the duration of an operation and returned
+    to the pool afterwards, so that repeated calls reuse the same memory.
+    Free fields are kept per (field type, grid, dtype). The number of
+    bytes checked out at any time, and its peak, are tracked.
+    """
+
+    def __init__(self) -> None:
+        self._free: Dict[Tuple, List[EnvironField]] = {}
+        self._in_use: Dict[int, EnvironField] = {}
+        self.nbytes = 0
+        self.nbytes_in_use = 0
+        self.peak_nbytes = 0
+
+    def checkout(
+        self,
+        cls: Type[EnvironField],
+        grid: EnvironGrid,
+        dtype: DTypeLike = np.float64,
+        label: str = '',
+        zero: bool = True,
+    ) -> EnvironField:
+        """Hand out a field, allocating it only if none is free.
+
+        Reused fields are zeroed unless `zero` is False, in which case
+        their content is undefined.
+        """
+        free = self._free.setdefault(_key(cls, grid, dtype), [])
+
+        if free:
+            field = free.pop()
+            if zero: field.fill(0.)
+            field.touch()
+        else:
+            field = cls(grid, dtype=dtype)
+            self.nbytes += field.nbytes
+
+        field.label = label
+        field.cache_reciprocal = False
+
+        self._in_use[id(field)] = field
+        self.nbytes_in_use += field.nbytes
+        self.peak_nbytes = max(self.peak_nbytes, self.nbytes_in_use)
+
+        return field
+
+    def release(self, *fields: EnvironField) -> None:
+        """Return checked out fields to the pool.
+
+        Fields not handed out by the pool, or already returned, raise a
+        ValueError.
+        """
+        for field in fields:
+            if self._in_use.get(id(field)) is not field:
+                raise ValueError("field is not checked out from the pool")
+
+            del self._in_use[id(field)]
+
+            key = _key(type(field), field.grid, field.dtype)
+            self._free.setdefault(key, []).append(field)
+            self.nbytes_in_use -= field.nbytes
+
+    def clear(self) -> None:
+        """Drop all free fields."""
+        self._free.clear()
+        self.nbytes = self.nbytes_in_use
+
+
+def _key(
+    cls: Type[EnvironField],
+    grid: EnvironGrid,
+    dtype: DTypeLike,
+) -> Tuple:
+    """docstring"""
+    # pooled fields keep their grid alive, so its id is never reused
+    return cls, id(grid), np.dtype(dtype)
@@ -1,11 +1,15 @@
-from typing import Tuple
+from typing import List, Optional, Sequence, Tuple
 from numpy import ndarray, newaxis
 
 import numpy as np
+from collections import OrderedDict
 from itertools import product
 
 from dftpy.grid import DirectGrid
 
+# largest |cosine| between lattice vectors treated as orthogonal
+ORTHORHOMBIC_TOL = 1e-8
+
 
 class EnvironGrid(DirectGrid):
     """docstring"""
@@ -16,22 +20,249 @@ class EnvironGrid(DirectGrid):
         nr: ndarray,
         label: str = '',
         units: str = 'bohr',
+        distance_budget: Optional[int] = 2**28,
     ) -> None:
         super().__init__(at, nr, units=units)
         self.label = label
         self.corners = -np.array(list(product(range(2), repeat=3))).dot(at)
 
+        # separable form of the grid points: r = sum_i axes[i] * lattice[i]
+        self.axes = tuple(np.arange(n) / n for n in self.nr)
+
+        self.distance_budget = distance_budget
+        self.distance_hits = 0
+        self.distance_misses = 0
+        self._distances: OrderedDict = OrderedDict()
+        self.clear_distance_cache()
+
+    @property
+    def distance_nbytes(self) -> int:
+        """Memory (in bytes) held by the cached distance fields."""
+        return sum(r.nbytes + r2.nbytes for r, r2 in self._distances.values())
+
+    @property
+    def orthorhombic(self) -> bool:
+        """Whether the lattice vectors are (nearly) orthogonal."""
+        self._check_lattice()
+        return self._orthorhombic
+
+    def clear_distance_cache(self) -> None:
+        """Drop all cached distance fields (and re-inspect the lattice)."""
+        self._distances.clear()
+        self._distances_lattice = np.array(self.lattice)
+        self._orthorhombic = _is_orthorhombic(self.lattice)
+
+    def _check_lattice(self) -> None:
+        """Re-inspect the lattice if it has changed (e.g. in place)."""
+        if not np.array_equal(self._distances_lattice, self.lattice):
+            self.clear_distance_cache()
+
     def get_min_distance(
         self,
         origin: ndarray,
         dim: int = 0,
         axis: int = 0,
     ) -> Tuple[ndarray, ndarray]:
-        """docstring"""
-        r = self.r - origin[:, newaxis, newaxis, newaxis]
-        r, r2 = self._apply_minimum_image_convension(r, dim, axis)
+        """Minimum-image distance vectors and squared distances to origin.
+
+        Results are kept in a least-recently-used cache within the
+        distance budget (in bytes, None for no limit), and returned as
+        read-only arrays.
+        """
+        self._check_lattice()
+
+        origin = np.asarray(origin, dtype=float)
+        key = (origin.tobytes(), dim, axis)
+
+        cached = self._distances.get(key)
+
+        if cached is not None:
+            self.distance_hits += 1
+            self._distances.move_to_end(key)
+            return cached
+
+        self.distance_misses += 1
+
+        if self.orthorhombic:
+            s = self.get_min_distance_axes(origin, dim, axis)
+            r = self.to_cartesian(s)
+            r2 = np.zeros(self.nr)
+            for lattice_vector, si in zip(self.lattice, _broadcastable(s)):
+                r2 += si**2 * lattice_vector.dot(lattice_vector)
+        else:
+            r = self.to_cartesian(self._wrap_axes(origin))
+            r, r2 = self._check_corners(r, dim, axis)
+
+        r.flags.writeable = False
+        r2.flags.writeable = False
+
+        self._cache_distance(key, r, r2)
+
+        return r, r2
+
+    def _cache_distance(self, key: Tuple, r: ndarray, r2: ndarray) -> None:
+        """Store a distance field, evicting the least recently used ones."""
+        budget = self.distance_budget
+        nbytes = r.nbytes + r2.nbytes
+
+        if budget is not None:
+            if nbytes > budget: return
+
+            while self._distances and self.distance_nbytes + nbytes > budget:
+                self._distances.popitem(last=False)
+
+        self._distances[key] = (r, r2)
+
+    def get_min_distance_axes(
+        self,
+        origin: ndarray,
+        dim: int = 0,
+        axis: int = 0,
+    ) -> Tuple[ndarray, ...]:
+        """Minimum-image fractional coordinates along each lattice vector.
+
+        Only available for orthorhombic cells, where the convention is
+        exact along each lattice vector separately. Directions dropped by
+        a line (dim = 1) or plane (dim = 2) reduction are set to zero.
+        """
+        if not self.orthorhombic:
+            raise ValueError("separable distances need an orthorhombic cell")
+
+        axes = []
+
+        for i, s in enumerate(self._wrap_axes(origin)):
+            s -= np.round(s)
+
+            # a line drops its axis, a plane keeps only its normal
+            if (dim == 1 and i == axis) or (dim == 2 and i != axis): s[:] = 0.
+
+            axes.append(s)
+
+        return tuple(axes)
+
+    def get_local_distance(
+        self,
+        origin: ndarray,
+        radius: float,
+    ) -> Optional[Tuple[Tuple[ndarray, ...], ndarray, ndarray]]:
+        """Distances to origin on the periodic sub-box around a sphere.
+
+        Returns the (wrapped) indices of the box points in full grid
+        fields, with their distance vectors and squared distances. Within
+        the radius, these are the minimum-image distances. None is returned
+        if the box would span the cell along any lattice vector.
+        """
+        local = self.get_local_axes(origin, radius)
+
+        if local is None: return None
+
+        axes, index = local
+
+        r = self.to_cartesian(axes)
+        r2 = np.einsum('i...,i...', r, r)
+
+        return np.ix_(*index), r, r2
+
+    def get_local_axes(
+        self,
+        origin: ndarray,
+        radius: float,
+    ) -> Optional[Tuple[List[ndarray], List[ndarray]]]:
+        """Fractional coordinates and indices of the sub-box around a sphere.
+
+        None is returned if the box would span the cell along any lattice
+        vector.
+        """
+        origin = np.asarray(origin, dtype=float)
+        origin_s = np.linalg.solve(self.lattice.T, origin)
+
+        # fractional extent of the sphere along each lattice vector
+        extent = radius * np.linalg.norm(np.linalg.inv(self.lattice), axis=0)
+
+        axes = []
+        index = []
+
+        for n, o, e in zip(self.nr, origin_s, extent):
+            first = int(np.floor((o - e) * n))
+            last = int(np.ceil((o + e) * n))
+
+            if last - first + 1 >= n: return None
+
+            points = np.arange(first, last + 1)
+            axes.append(points / n - o)
+            index.append(points % n)
+
+        return axes, index
+
+    def get_min_distance_batch(
+        self,
+        origins: ndarray,
+        dim: int = 0,
+        axis: int = 0,
+        planes: slice = slice(None),
+    ) -> Tuple[ndarray, ndarray]:
+        """Minimum-image distances from several origins at once.
+
+        Covers the selected grid planes along the first lattice vector.
+        Returns distance vectors of shape (3, norigins, nplanes, n1, n2)
+        and the squared distances. Results are not cached.
+        """
+        origins = np.reshape(origins, (-1, 3))
+        origins_s = np.linalg.solve(self.lattice.T, origins.T)
+
+        axes = []
+
+        for i, (s, o) in enumerate(zip(self.axes, origins_s)):
+            if i == 0: s = s[planes]
+            s = s[newaxis, :] - o[:, newaxis]
+
+            if self.orthorhombic:
+                s -= np.round(s)
+                if (dim == 1 and i == axis) or (dim == 2 and i != axis):
+                    s[:] = 0.
+            else:
+                s -= np.floor(s)
+
+            axes.append(s)
+
+        shape = (3, len(origins), *(s.shape[1] for s in axes))
+
+        broadcast = (
+            axes[0][:, :, newaxis, newaxis],
+            axes[1][:, newaxis, :, newaxis],
+            axes[2][:, newaxis, newaxis, :],
+        )
+
+        r = np.zeros(shape)
+
+        for lattice_vector, s in zip(self.lattice, broadcast):
+            r += lattice_vector.reshape(3, 1, 1, 1, 1) * s
+
+        if not self.orthorhombic: return self._check_corners(r, dim, axis)
+
+        r2 = np.zeros(r.shape[1:])
+        for lattice_vector, s in zip(self.lattice, broadcast):
+            r2 += s**2 * lattice_vector.dot(lattice_vector)
+
         return r, r2
 
+    def to_cartesian(self, axes: Sequence[ndarray]) -> ndarray:
+        """Materialize 3D cartesian vectors from 1D fractional coordinates."""
+        r = np.zeros((3, *(len(s) for s in axes)))
+
+        for lattice_vector, s in zip(self.lattice, _broadcastable(axes)):
+            r += lattice_vector[:, newaxis, newaxis, newaxis] * s
+
+        return r
+
+    def _wrap_axes(self, origin: ndarray) -> Tuple[ndarray, ndarray, ndarray]:
+        """Fractional coordinates relative to origin, wrapped to [0, 1)."""
+        origin_s = np.linalg.solve(self.lattice.T, origin)
+        axes = tuple(s - o for s, o in zip(self.axes, origin_s))
+        for s in axes:
+            s -= np.floor(s)
+        return axes
+
     def _get_direction(
         self,
         dim: int = 0,
@@ -63,9 +294,9 @@ class EnvironGrid(DirectGrid):
         if dim == 0:
             pass
         elif dim == 1:
-            r = r - np.einsum('jkl,i->ijkl', np.einsum('ijkl,i->jkl', r, n), n)
+            r = r - np.einsum('...,i->i...', np.einsum('i...,i->...', r, n), n)
         elif dim == 2:
-            r = np.einsum('jkl,i->ijkl', np.einsum('ijkl,i->jkl', r, n), n)
+            r = np.einsum('...,i->i...', np.einsum('i...,i->...', r, n), n)
         else:
             raise ValueError("dimensions out of range")
         return r
@@ -78,13 +309,26 @@ class EnvironGrid(DirectGrid):
     ) -> Tuple[ndarray, ndarray]:
         """docstring"""
 
-        n = self._get_direction(dim, axis)
-
         # apply minimum image convension
         reciprocal_lattice = self.get_reciprocal().lattice / 2 / np.pi
         s = np.einsum('lijk,ml->mijk', r, reciprocal_lattice)
         s -= np.floor(s)
         r = np.einsum('lm,lijk->mijk', self.lattice, s)
+
+        return self._check_corners(r, dim, axis)
+
+    def _check_corners(
+        self,
+        r: ndarray,
+        dim: int = 0,
+        axis: int = 0,
+    ) -> Tuple[ndarray, ndarray]:
+        """Pick the shortest image among the corners of the cell.
+
+        `r` must hold vectors with fractional coordinates in [0, 1).
+        """
+        n = self._get_direction(dim, axis)
+
         r = self._reduce_dimension(r, n, dim)
 
         # pre-corner-check results
@@ -94,11 +338,28 @@ class EnvironGrid(DirectGrid):
         t = r
         # check against corner shifts
         for corner in self.corners[1:]:
-            r = t + corner[:, np.newaxis, np.newaxis, np.newaxis]
+            r = t + corner.reshape(3, *(1, ) * (t.ndim - 1))
             r = self._reduce_dimension(r, n, dim)
             r2 = np.einsum('i...,i...', r, r)
             mask = r2 < r2min
-            rmin = np.where(mask[newaxis, :, :, :], r, rmin)
+            rmin = np.where(mask[newaxis], r, rmin)
             r2min = np.where(mask, r2, r2min)
 
         return rmin, r2min
+
+
+def _is_orthorhombic(lattice: ndarray) -> bool:
+    """Check whether the lattice vectors are (nearly) orthogonal."""
+    norms = np.linalg.norm(lattice, axis=1)
+    cosines = lattice.dot(lattice.T) / np.outer(norms, norms)
+    return np.allclose(cosines, np.eye(3), rtol=0., atol=ORTHORHOMBIC_TOL)
+
+
+def _broadcastable(
+    axes: Sequence[ndarray]) -> Tuple[ndarray, ndarray, ndarray]:
+    """Reshape 1D per-axis arrays so that they broadcast to the 3D grid."""
+    return (
+        axes[0][:, newaxis, newaxis],
+        axes[1][newaxis, :, newaxis],
+        axes[2][newaxis, newaxis, :],
+    )
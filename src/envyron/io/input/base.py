@@ -28,6 +28,7 @@ from envyron.io.input.types import (
     ElectrostaticSolver,
     EntropyScheme,
     Environment,
+    FFTLibrary,
     FloatGE1,
     FloatVector,
     IntGT1,
@@ -38,6 +39,7 @@ from envyron.io.input.types import (
     PBCCore,
     PBCCorrection,
     PositiveFloatList,
+    Precision,
     Preconditioner,
     RadiusMode,
     ScreeningType,
@@ -95,10 +97,17 @@ class ControlModel(BaseModel):
     restart = False
     verbosity: NonNegativeInt = 0
     threshold: NonNegativeFloat = 0.1
+    density_threshold: NonNegativeFloat = 0.0
     nskip: NonNegativeInt = 1
     ecut: NonNegativeFloat = 0.0
     nrep: NonNegativeIntVector = [0, 0, 0]  # type: ignore
     need_electrostatic = False
+    fft_backend: FFTLibrary = 'scipy'
+    fft_threads: NonNegativeInt = 1
+    fft_wisdom: Optional[str] = None
+    kernel_budget: Optional[NonNegativeInt] = None
+    distance_budget: Optional[NonNegativeInt] = 2**28
+    precision: Precision = 'double'
 
 
 class EnvironmentModel(BaseModel):
@@ -117,6 +126,7 @@ class IonsModel(BaseModel):
     atomicspread: PositiveFloatList = [0.5]  # type: ignore
     corespread: NonNegativeFloatList = [0.5]  # type: ignore
     solvationrad: PositiveFloatList = [0.0]  # type: ignore
+    reciprocal = False
 
 
 class SystemModel(BaseModel):
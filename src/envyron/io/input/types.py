@@ -146,6 +146,17 @@ PBCCore = Literal[
     '1da',
 ]
 
+FFTLibrary = Literal[
+    'numpy',
+    'scipy',
+    'pyfftw',
+]
+
+Precision = Literal[
+    'double',
+    'mixed',
+]
+
 # yapf: enable
 
 
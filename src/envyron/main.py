@@ -188,10 +188,13 @@ class Main:
                                 self.setup.input.solvent.radius_mode,
                                 self.setup.lsoftcavity,
                                 self.setup.lsmearedions,
-                                self.setup.lcoredensity, self.setup.cell)
+                                self.setup.lcoredensity, self.setup.cell,
+                                self.setup.fft
+                                if self.setup.lreciprocalions else None)
 
         # Electrons
-        self.electrons = EnvironElectrons(self.setup.cell)
+        self.electrons = EnvironElectrons(self.setup.cell,
+                                          self.setup.density_threshold)
 
         # System
         self.system = EnvironSystem(self.setup.input.system.ntyp,
@@ -284,8 +287,10 @@ class Main:
             self.charges.add(dielectric=self.static)
 
         if self.setup.loptical:
-            self.optical = EnvironDielectric(self.solvent,
-                                             self.setup.optical_permittivity,
-                                             self.setup.need_gradient,
-                                             self.setup.need_factsqrt,
-                                             self.setup.need_auxiliary)
+            self.optical = EnvironDielectric(
+                self.solvent,
+                self.setup.optical_permittivity,
+                self.setup.need_gradient,
+                self.setup.need_factsqrt,
+                self.setup.need_auxiliary,
+                share=self.static if self.setup.lstatic else None)
@@ -1,7 +1,14 @@
+from __future__ import annotations
+
+from typing import Iterable, List, Optional, Tuple
+from numpy import ndarray
+
 import numpy as np
 
 from ..utils.constants import FPI, E2
-from ..representations import EnvironDensity, EnvironGradient
+from ..utils.kernels import dielectric_profiles
+from ..representations import EnvironField, EnvironDensity, EnvironGradient
+from ..representations.sparse import flat_view
 from ..boundaries import EnvironBoundary, ElectronicBoundary
 
 
@@ -15,22 +22,46 @@ class EnvironDielectric:
         need_gradient=False,
         need_factsqrt=False,
         need_auxiliary=False,
+        share: Optional[EnvironDielectric] = None,
     ) -> None:
         self.boundary = boundary
         self.constant = constant
 
+        # dielectrics on the same boundary, with profiles computed together
+        if share is None:
+            self.group = [self]
+        elif share.boundary is not boundary:
+            raise ValueError("dielectrics can only share the same boundary")
+        else:
+            self.group = share.group
+            self.group.append(self)
+
+        # boundary state (switch version and constant) of the profiles
+        self._state: Optional[Tuple[int, float]] = None
+
+        # gradient of the last potential, valid while the potential (same
+        # object, same version) is unchanged
+        self._potential: Optional[EnvironField] = None
+        self._potential_version = -1
+        self._potential_gradient: Optional[EnvironGradient] = None
+
         grid = boundary.grid
 
-        self.background = EnvironDensity(grid)
-        self.epsilon = EnvironDensity(grid)
-        self.depsilon = EnvironDensity(grid)
-        self.gradlogepsilon = EnvironGradient(grid)
+        # dielectric profiles share the precision of the boundary, while
+        # the polarization densities stay in double precision
+        dtype = boundary.switch.dtype
+
+        self.background = EnvironDensity(grid, dtype=dtype)
+        self.epsilon = EnvironDensity(grid, dtype=dtype)
+        self.depsilon = EnvironDensity(grid, dtype=dtype)
+        self.gradlogepsilon = EnvironGradient(grid, dtype=dtype)
 
         self.need_gradient = need_gradient
-        if self.need_gradient: self.gradient = EnvironGradient(grid)
+        if self.need_gradient:
+            self.gradient = EnvironGradient(grid, dtype=dtype)
 
         self.need_factsqrt = need_factsqrt
-        if self.need_factsqrt: self.factsqrt = EnvironDensity(grid)
+        if self.need_factsqrt: self.factsqrt = EnvironDensity(grid, dtype=dtype)
 
         self.need_auxiliary = need_auxiliary
         if self.need_auxiliary: self.iterative = EnvironDensity(grid)
@@ -57,47 +88,99 @@ class EnvironDielectric:
                 self.updating = False
 
     def of_boundary(self) -> None:
-        """docstring"""
+        """Permittivity of the dielectrics sharing the boundary.
+
+        All dielectrics of the group that are not up to date with the
+        boundary are computed together, sharing the quantities derived from
+        the switch, so later calls from the others return immediately.
+        """
+
+        switch = self.boundary.switch
+        workspace = self.boundary.cores.workspace
+
+        pending = [
+            dielectric for dielectric in self.group
+            if dielectric._state != (switch.version, dielectric.constant)
+        ]
+
+        if not pending: return
 
         # for the time being we just consider a uniform background (no regions)
-        self.background[:] = self.constant
+        for dielectric in pending:
+            dielectric.background[:] = dielectric.constant
 
-        if isinstance(self.boundary, ElectronicBoundary):
+        # electronic profiles keep dlogeps in borrowed fields
+        borrowed: List[EnvironDensity] = []
 
-            self.epsilon[:] = \
-                np.exp(np.log(self.background) * (1. - self.boundary.switch))
+        try:
+            if isinstance(self.boundary, ElectronicBoundary):
 
-            self.depsilon[:] = -self.epsilon * np.log(self.background)
-            dlogeps = -np.log(self.background)
+                for dielectric in pending:
+                    borrowed.append(
+                        workspace.checkout(
+                            EnvironDensity,
+                            self.boundary.grid,
+                            dielectric.epsilon.dtype,
+                            zero=False,
+                        ))
 
-            if self.need_factsqrt:
-                d2eps = self.epsilon * np.log(self.background)**2
+                dlogeps = borrowed
 
-        else:
+                dielectric_profiles(
+                    flat_view(switch, 1)[0],
+                    _flat_fields(dielectric.background for dielectric in pending),
+                    _flat_fields(dielectric.epsilon for dielectric in pending),
+                    _flat_fields(dielectric.depsilon for dielectric in pending),
+                    _flat_fields(dlogeps),
+                )
 
-            self.epsilon[:] = \
-                1. + (self.background - 1.) * (1. - self.boundary.switch)
+                d2eps = []
+                for dielectric, dlog in zip(pending, dlogeps):
+                    dielectric.epsilon.touch()
+                    dielectric.depsilon.touch()
 
-            self.depsilon[:] = 1. - self.background
-            dlogeps = self.depsilon / self.epsilon
+                    d2eps.append(
+                        dielectric.epsilon * dlog**2
+                        if dielectric.need_factsqrt else None)
 
-            if self.need_factsqrt: d2eps = 0.
+            else:
 
-        # compute derived quantities
+                complement = 1. - switch
 
-        self.gradlogepsilon[:] = self.boundary.gradient * dlogeps
+                dlogeps = []
+                for dielectric in pending:
+                    dielectric.epsilon[:] = \
+                        1. + (dielectric.background - 1.) * complement
 
-        if self.need_gradient:
-            self.gradient[:] = self.boundary.gradient * self.depsilon
+                    dielectric.depsilon[:] = 1. - dielectric.background
+                    dlogeps.append(dielectric.depsilon / dielectric.epsilon)
 
-        if self.need_factsqrt:
+                d2eps = [0.] * len(pending)
 
-            self.factsqrt[:] = \
-                (d2eps - 0.5 * self.depsilon**2 / self.epsilon) * \
-                self.boundary.gradient.modulus**2 + \
-                self.depsilon * self.boundary.laplacian
+            # compute derived quantities
 
-            self.factsqrt[:] *= 0.5 / E2 / FPI
+            if any(dielectric.need_factsqrt for dielectric in pending):
+                modulus2 = self.boundary.gradient.modulus**2
+
+            for dielectric, dlog, d2 in zip(pending, dlogeps, d2eps):
+                dielectric.gradlogepsilon[:] = self.boundary.gradient * dlog
+
+                if dielectric.need_gradient:
+                    dielectric.gradient[:] = \
+                        self.boundary.gradient * dielectric.depsilon
+
+                if dielectric.need_factsqrt:
+
+                    dielectric.factsqrt[:] = \
+                        (d2 - 0.5 * dielectric.depsilon**2 / dielectric.epsilon) * \
+                        modulus2 + dielectric.depsilon * self.boundary.laplacian
+
+                    dielectric.factsqrt[:] *= 0.5 / E2 / FPI
+
+                dielectric._state = (switch.version, dielectric.constant)
+
+        finally:
+            workspace.release(*borrowed)
 
     def of_potential(
         self,
@@ -105,8 +188,8 @@ class EnvironDielectric:
         potential: EnvironDensity,
     ) -> None:
         """docstring"""
-        gradient = self.boundary.cores.derivatives.gradient(potential)
-        self.density[:] = gradient.scalar_product(self.gradlogepsilon)
+        gradient = self._gradient_of(potential)
+        gradient.scalar_product(self.gradlogepsilon, out=self.density)
 
         self.density[:] = \
             self.density / FPI / E2 + (1. - self.epsilon) / self.epsilon * charges
@@ -119,7 +202,7 @@ class EnvironDielectric:
         de_dboundary: EnvironDensity,
     ) -> None:
         """docstring"""
-        gradient = self.boundary.cores.derivatives.gradient(potential)
+        gradient = self._gradient_of(potential)
         de_dboundary -= gradient.modulus**2 * self.depsilon * 0.5 / FPI / E2
 
     def dv_dboundary(
@@ -129,8 +212,36 @@ class EnvironDielectric:
         dv_dboundary: EnvironDensity,
     ) -> None:
         """docstring"""
-        gradient = self.boundary.cores.derivatives.gradient(potential)
+        gradient = self._gradient_of(potential)
         dgradient = self.boundary.cores.derivatives.gradient(dpotential)
 
         dv_dboundary -= \
             gradient.scalar_product(dgradient) * self.depsilon / FPI / E2
+
+    def _gradient_of(self, potential: EnvironDensity) -> EnvironGradient:
+        """Gradient of a potential, reused while the potential is unchanged.
+
+        The gradient (and its modulus) is kept for the last potential, so
+        that the quantities of one electrostatic step share a single
+        derivative of the potential.
+        """
+        derivatives = self.boundary.cores.derivatives
+
+        if not isinstance(potential, EnvironField):
+            return derivatives.gradient(potential)
+
+        if potential is not self._potential or \
+                potential.version != self._potential_version:
+            self._potential_gradient = derivatives.gradient(
+                potential,
+                out=self._potential_gradient,
+            )
+            self._potential = potential
+            self._potential_version = potential.version
+
+        return self._potential_gradient
+
+
+def _flat_fields(fields: Iterable[EnvironDensity]) -> Tuple[ndarray, ...]:
+    """Flat views of several scalar fields."""
+    return tuple(flat_view(field, 1)[0] for field in fields)
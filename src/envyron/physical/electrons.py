@@ -10,13 +10,21 @@ from ..representations import EnvironDensity
 class EnvironElectrons:
     """docstring"""
 
-    def __init__(self, grid: EnvironGrid) -> None:
+    def __init__(self, grid: EnvironGrid, threshold: float = 0.) -> None:
         self.density = EnvironDensity(grid, label='electrons')
         self.charge = self.density.charge
         self.count = int(np.rint(self.charge))
 
         self.updating = False
 
+        # smallest change of the density (integral of its absolute value)
+        # passed on to the dependent quantities, measured with respect to
+        # the last density that was passed on
+        self.threshold = threshold
+        self.reference: Optional[EnvironDensity] = None
+        self.change = 0.
+        self.changed = True
+
     def update(self, rho: ndarray, nelec: Optional[int] = None) -> None:
         """docstring"""
         self.density[:] = rho
@@ -29,3 +37,22 @@ class EnvironElectrons:
             if error > 5e-3:
                 raise ValueError(
                     f"{error:.2e} error in integrated electronic charge")
+
+        self._check_change()
+
+    def _check_change(self) -> None:
+        """Flag whether the density changed significantly."""
+        if self.threshold == 0.:
+            self.changed = True
+            return
+
+        if self.reference is None:
+            self.reference = EnvironDensity(self.density.grid,
+                                            label='electrons_reference')
+            self.change = np.inf
+        else:
+            self.change = \
+                np.abs(self.density - self.reference).sum() * self.density.grid.dV
+
+        self.changed = self.change >= self.threshold
+        if self.changed: self.reference[:] = self.density
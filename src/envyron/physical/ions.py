@@ -1,4 +1,4 @@
-from typing import List, Optional, Union
+from typing import TYPE_CHECKING, List, Optional, Union
 from numpy import ndarray
 
 import numpy as np
@@ -9,6 +9,11 @@ from ..representations import EnvironDensity
 from ..representations.functions import FunctionContainer, EnvironGaussian
 from .iontype import EnvironIonType
 
+if TYPE_CHECKING: from ..cores import FFTCore
+
+# largest fraction of moved ions updated incrementally
+INCREMENTAL_FRACTION = 0.5
+
 
 class EnvironIons:
     """docstring"""
@@ -28,8 +33,13 @@ class EnvironIons:
         smear: bool,
         fill_cores: bool,
         grid: EnvironGrid,
+        core: Optional['FFTCore'] = None,
     ) -> None:
 
+        # smeared ion and core densities are built in reciprocal space
+        # (from structure factors) if an FFT core is given
+        self.core = core
+
         self.count = nions
         self.ntypes = ntypes
         self.itypes = itypes
@@ -56,6 +66,9 @@ class EnvironIons:
 
         self.coords = np.zeros((nions, 3))
 
+        # whether densities were built for the current coordinates
+        self._built = False
+
         if smear: self._generate_smeared_ions(grid)
 
         if fill_cores: self._generate_core_electrons(grid)
@@ -162,6 +175,24 @@ class EnvironIons:
         if len(coords) != self.count:
             raise ValueError("mismatch in number of atoms")
 
+        moved = np.flatnonzero(np.any(coords != self.coords, axis=1))
+
+        incremental = \
+            self._built and len(moved) <= self.count * INCREMENTAL_FRACTION
+
+        densities = []
+        if self.smeared: densities.append((self.smeared_ions, self.density))
+        if self.filled_cores:
+            densities.append((self.core_electrons, self.core_density))
+
+        # contributions of the moved ions at their old positions
+        if incremental:
+            positions = self.coords[moved].copy()
+            if self.core is None:
+                previous = [[
+                    functions.functions[i].local('density') for i in moved
+                ] for functions, _ in densities]
+
         self.coords[:] = coords
 
         if center is not None:
@@ -176,11 +207,29 @@ class EnvironIons:
 
             self.com /= total_weight
 
-        if self.smeared:
-            self.density[:] = 0.
+        for k, (functions, density) in enumerate(densities):
 
-            for i in range(self.count):
-                self.density[:] += self.smeared_ions[i].density
+            if not incremental:
+                functions.reset_derivatives()
+
+                if self.core is not None:
+                    self.core.gaussians(functions, out=density)
+                else:
+                    density[:] = functions.density()
+
+            elif self.core is not None:
+                subset = functions[moved.tolist()]
+                subset.reset_derivatives()
+                self.core.displace_gaussians(subset, positions, out=density)
+
+            else:
+                for i, old in zip(moved.tolist(), previous[k]):
+                    old.scatter_add(density, -1.)
+                    function = functions.functions[i]
+                    function.reset_derivatives()
+                    function.local('density').scatter_add(density)
+
+        self._built = True
 
         self.dipole = 0.
         self.quadrupole_pc = 0.
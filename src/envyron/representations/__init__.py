@@ -2,3 +2,4 @@ from .field import EnvironField
 from .density import EnvironDensity
 from .gradient import EnvironGradient
 from .hessian import EnvironHessian
+from .sparse import EnvironSparseField
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from typing import Optional
 from numpy import ndarray
+from numpy.typing import DTypeLike
 
 import numpy as np
 
@@ -17,8 +18,16 @@ class EnvironDensity(EnvironField):
         grid: EnvironGrid,
         data: Optional[ndarray] = None,
         label: str = '',
+        dtype: DTypeLike = None,
     ) -> EnvironDensity:
-        obj = super().__new__(cls, grid, rank=1, data=data, label=label)
+        obj = super().__new__(
+            cls,
+            grid,
+            rank=1,
+            data=data,
+            label=label,
+            dtype=dtype,
+        )
         obj._charge = None
         obj.dipole = np.zeros(3)
         obj.quadrupole = np.zeros(3)
@@ -34,10 +43,41 @@ class EnvironDensity(EnvironField):
 
     def compute_multipoles(self, origin: ndarray) -> None:
         """docstring"""
+        if self.grid.orthorhombic:
+            self._compute_separable_multipoles(origin)
+            return
+
         r, _ = self.grid.get_min_distance(origin)
         self.dipole = np.einsum('ijk,lijk', self, r) * self.grid.dV
         self.quadrupole = np.einsum('ijk,lijk', self, r**2) * self.grid.dV
 
+    def _compute_separable_multipoles(self, origin: ndarray) -> None:
+        """Multipoles from 1D minimum-image coordinates.
+
+        With r = sum_i s_i a_i, only the first and second moments of the
+        density along (pairs of) lattice vectors are needed, which follow
+        from its 2D projections onto the lattice planes.
+        """
+        s = self.grid.get_min_distance_axes(origin)
+        lattice = self.grid.lattice
+
+        p01 = np.sum(self, axis=2)
+        p02 = np.sum(self, axis=1)
+        p12 = np.sum(self, axis=0)
+
+        p = (np.sum(p01, axis=1), np.sum(p01, axis=0), np.sum(p02, axis=0))
+
+        first = np.array([p[i].dot(s[i]) for i in range(3)])
+
+        second = np.diag([p[i].dot(s[i]**2) for i in range(3)])
+        second[0, 1] = second[1, 0] = s[0].dot(p01).dot(s[1])
+        second[0, 2] = second[2, 0] = s[0].dot(p02).dot(s[2])
+        second[1, 2] = second[2, 1] = s[1].dot(p12).dot(s[2])
+
+        self.dipole = first.dot(lattice) * self.grid.dV
+        self.quadrupole = \
+            np.einsum('im,jm,ij->m', lattice, lattice, second) * self.grid.dV
+
     def euclidean_norm(self) -> float:
         """docstring"""
         return np.einsum('ijk,ijk', self, self)
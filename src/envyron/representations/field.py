@@ -1,7 +1,10 @@
 from __future__ import annotations
 
-from typing import Optional
+from typing import Any, Optional, Tuple
 from numpy import ndarray
+from numpy.typing import DTypeLike
+
+import numpy as np
 
 from dftpy.field import DirectField
 
@@ -11,17 +14,83 @@ from ..domains.cell import EnvironGrid
 class EnvironField(DirectField):
     """docstring"""
 
+    _reciprocal: Optional[Tuple[Any, int, ndarray]]
+
     def __new__(
         cls,
         grid: EnvironGrid,
         rank: int = 1,
         data: Optional[ndarray] = None,
         label: str = '',
+        dtype: DTypeLike = None,
     ) -> EnvironField:
+        if dtype is not None:
+            if data is None:
+                shape = grid.nr if rank == 1 else (rank, *grid.nr)
+                data = np.zeros(shape, dtype=dtype)
+            else:
+                data = np.asarray(data, dtype=dtype)
         obj = super().__new__(cls, grid, rank=rank, data=data)
         obj.label = label
         return obj
 
+    def __array_finalize__(self, obj: Optional[ndarray]) -> None:
+        super().__array_finalize__(obj)
+        # views and derived arrays never share a cached transform
+        self.cache_reciprocal = False
+        self._version = 0
+        self._reciprocal = None
+
+    @property
+    def version(self) -> int:
+        """Counter bumped on every in-place write through the field."""
+        return self._version
+
+    def touch(self) -> None:
+        """Flag the data as modified.
+
+        Needed only for writes that bypass the field, e.g. through a view
+        or the `out` argument of a numpy function.
+        """
+        self._version += 1
+        self._reciprocal = None
+
+    def get_reciprocal(self, key: Any) -> Optional[ndarray]:
+        """Return the cached transform for `key` if still up to date."""
+        if self._reciprocal is None: return None
+        cached_key, version, data_g = self._reciprocal
+        if cached_key is not key or version != self._version: return None
+        return data_g
+
+    def set_reciprocal(self, key: Any, data_g: ndarray) -> None:
+        """Cache a transform of the current data (only if opted in)."""
+        if self.cache_reciprocal:
+            self._reciprocal = (key, self._version, data_g)
+
+    def __setitem__(self, index: Any, value: Any) -> None:
+        self.touch()
+        super().__setitem__(index, value)
+
+    def __iadd__(self, other: Any) -> EnvironField:
+        self.touch()
+        return super().__iadd__(other)
+
+    def __isub__(self, other: Any) -> EnvironField:
+        self.touch()
+        return super().__isub__(other)
+
+    def __imul__(self, other: Any) -> EnvironField:
+        self.touch()
+        return super().__imul__(other)
+
+    def __itruediv__(self, other: Any) -> EnvironField:
+        self.touch()
+        return super().__itruediv__(other)
+
+    def __ipow__(self, other: Any) -> EnvironField:
+        self.touch()
+        return super().__ipow__(other)
+
     def standard_view(self) -> 'EnvironField':
         """docstring"""
         return self.T.reshape(self.grid.nnr, self.rank)
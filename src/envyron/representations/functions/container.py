@@ -1,19 +1,47 @@
 from __future__ import annotations
 
-from typing import Iterator, List, Union
+from typing import Dict, Iterator, List, Tuple, Type, Union, overload
+
+import numpy as np
 
 from ...domains import EnvironGrid
-from .. import EnvironDensity, EnvironGradient, EnvironHessian
+from .. import EnvironField, EnvironDensity, EnvironGradient, EnvironHessian
 from . import EnvironFunction
 
+# default number of (function, grid point) pairs evaluated at once
+BATCH_SIZE = 2**19
+
 
 class FunctionContainer:
-    """docstring"""
+    """
+    Collection of functions, summed into full grid fields.
+
+    Functions confined to a small sub-box of the cell are added from their
+    sparse form. The others are grouped by their parameters (e.g. all
+    functions of an ion type) and each group is evaluated at once, by
+    blocks of grid planes holding at most `batch_size` function-point pairs.
+    """
 
-    def __init__(self, grid: EnvironGrid) -> None:
+    def __init__(
+        self,
+        grid: EnvironGrid,
+        batch_size: int = BATCH_SIZE,
+    ) -> None:
         self.grid = grid
         self.functions: List[EnvironFunction] = []
         self.count = 0
+        self.batch_size = batch_size
+
+    @overload
+    def __getitem__(self, slice: int) -> EnvironFunction:
+        ...
+
+    @overload
+    def __getitem__(
+        self,
+        slice: Union[List[int], slice],
+    ) -> FunctionContainer:
+        ...
 
     def __getitem__(
         self,
@@ -23,7 +51,7 @@ class FunctionContainer:
         if isinstance(slice, int):
             return self.functions[slice]
         else:
-            subset = FunctionContainer(self.grid)
+            subset = FunctionContainer(self.grid, self.batch_size)
 
             if isinstance(slice, list):
                 for i in slice:
@@ -52,45 +80,91 @@ class FunctionContainer:
 
     def density(self) -> EnvironDensity:
         """docstring"""
-        density = EnvironDensity(self.grid)
-
-        for function in self:
-            density[:] += function.density
-
-        return density
+        return self._accumulate(EnvironDensity, 'density')
 
     def gradient(self) -> EnvironGradient:
         """docstring"""
-        gradient = EnvironGradient(self.grid)
-
-        for function in self:
-            gradient[:] += function.gradient
-
-        return gradient
+        return self._accumulate(EnvironGradient, 'gradient')
 
     def laplacian(self) -> EnvironDensity:
         """docstring"""
-        laplacian = EnvironDensity(self.grid)
+        return self._accumulate(EnvironDensity, 'laplacian')
 
-        for function in self:
-            laplacian[:] += function.laplacian
+    def hessian(self) -> EnvironHessian:
+        """docstring"""
+        return self._accumulate(EnvironHessian, 'hessian')
 
-        return laplacian
+    def derivative(self) -> EnvironDensity:
+        """docstring"""
+        return self._accumulate(EnvironDensity, 'derivative')
 
-    def hessian(self) -> EnvironHessian:
+    def _accumulate(self, cls: Type[EnvironField], name: str) -> EnvironField:
         """docstring"""
-        hessian = EnvironHessian(self.grid)
+        field = cls(self.grid)
 
-        for function in self:
-            hessian[:] += function.hessian
+        for functions in self._groups().values():
+            batch = []
 
-        return hessian
+            for function in functions:
+                if function.is_local:
+                    function.local(name).scatter_add(field)
+                else:
+                    batch.append(function)
 
-    def derivative(self) -> EnvironDensity:
-        """docstring"""
-        derivative = EnvironDensity(self.grid)
+            if batch: self._accumulate_batch(batch, name, field)
 
-        for function in self:
-            derivative[:] += function.derivative
+        return field
+
+    def _accumulate_batch(
+        self,
+        functions: List[EnvironFunction],
+        name: str,
+        field: EnvironField,
+    ) -> None:
+        """Add functions sharing their parameters, by blocks of grid planes."""
+        first = functions[0]
+        origins = np.array([function.pos for function in functions])
+
+        n0, n1, n2 = self.grid.nr
+        step = max(1, self.batch_size // (len(functions) * n1 * n2))
 
-        return derivative
+        flat = np.asarray(field).reshape(-1, n0, n1 * n2)
+
+        for start in range(0, n0, step):
+            planes = slice(start, start + step)
+
+            r, r2 = self.grid.get_min_distance_batch(
+                origins,
+                first.dim,
+                first.axis,
+                planes,
+            )
+
+            values = first.evaluate(name, r.reshape(3, -1), r2.ravel())
+            values = values.reshape(len(values), len(functions), -1)
+
+            block = flat[:, planes]
+            block += values.sum(axis=1).reshape(block.shape)
+
+        if name == 'density' and first.background != 0.:
+            flat += first.background * len(functions)
+
+        field.touch()
+
+    def _groups(self) -> Dict[Tuple, List[EnvironFunction]]:
+        """Functions grouped by everything but their position."""
+        groups: Dict[Tuple, List[EnvironFunction]] = {}
+
+        for function in self:
+            key = (
+                type(function),
+                function.kind,
+                function.dim,
+                function.axis,
+                function.width,
+                function.spread,
+                function.volume,
+            )
+            groups.setdefault(key, []).append(function)
+
+        return groups
@@ -1,155 +1,246 @@
+from typing import Tuple
+from numpy import ndarray
+
 import numpy as np
 import scipy.special as sp
 
 from ...utils.constants import FPI, SQRTPI
-from .. import EnvironDensity, EnvironGradient, EnvironHessian
-from . import EnvironFunction, FUNC_TOL
+from .. import (
+    EnvironDensity,
+    EnvironGradient,
+    EnvironHessian,
+    EnvironSparseField,
+)
+from . import EnvironFunction, EXP_TOL, FUNC_TOL
+
+ERFC_TOL = np.sqrt(EXP_TOL)
 
 
 class EnvironERFC(EnvironFunction):
-    """docstring"""
+    """
+    Error function profile, evaluated on its transition shell only.
+
+    Away from `width` by more than ERFC_TOL spreads, erfc is constant (2
+    inside, 0 outside) to numerical precision, so the function and its
+    derivatives are only computed on the shell. The density (and the
+    logarithm, whose derivatives do not vanish inside the shell) are stored
+    as sparse fields over the enclosed region, the derivatives over the
+    shell itself (see `local`).
+    """
 
     def _compute_density(self) -> None:
         """docstring"""
+        self._density = self._materialize(EnvironDensity, 'density')
 
-        _, r2 = self.grid.get_min_distance(self.pos, self.dim, self.axis)
-        dist = np.sqrt(r2)
-        arg = (dist - self.width) / self.spread
+    def _compute_gradient(self) -> None:
+        """docstring"""
+        self._gradient = self._materialize(EnvironGradient, 'gradient')
+
+    def _compute_laplacian(self) -> None:
+        """docstring"""
+        self._laplacian = self._materialize(EnvironDensity, 'laplacian')
 
-        self._density = EnvironDensity(self.grid, label=self.label)
+    def _compute_hessian(self) -> None:
+        """docstring"""
+        self._hessian = self._materialize(EnvironHessian, 'hessian')
+
+    def _compute_derivative(self) -> None:
+        """docstring"""
+        self._derivative = self._materialize(EnvironDensity, 'derivative')
 
-        if self.kind == 4: self._density[:] = self.volume
+    @property
+    def background(self) -> float:
+        """docstring"""
+        return self.volume if self.kind == 4 else 0.
 
-        density = np.zeros(self._density.shape)
-        density[:] = sp.erfc(arg)
+    @property
+    def cutoff(self) -> float:
+        """docstring"""
+        return self.width + ERFC_TOL * self.spread
 
-        integral = np.sum(density) * self.grid.volume / self.grid.nnrR * 0.5
+    def _compute_local(self, name: str) -> EnvironSparseField:
+        """docstring"""
+
+        indices, r, r2 = self._get_enclosed()
+
+        # derivatives of erfc vanish away from the transition shell
+        if name != 'density' and not name.startswith('log'):
+            dist = np.sqrt(r2)
+            shell = np.abs((dist - self.width) / self.spread) <= ERFC_TOL
+            shell &= dist > FUNC_TOL
+            indices, r, r2 = indices[shell], r[:, shell], r2[shell]
+
+        values = self.evaluate(name, r, r2)
+
+        if name == 'logdensity':
+            background = np.log(self.volume)
+            return EnvironSparseField(self.grid, indices, values, background)
+
+        if name != 'density':
+            return EnvironSparseField(self.grid, indices, values, 0., self.label)
 
-        charge = self._charge()
         analytic = self._erfc_volume()
+        integral = np.sum(values) / self._charge() * analytic * \
+                   self.grid.volume / self.grid.nnrR
 
         if np.abs((integral - analytic) / analytic > 1e-4):
             print("\nWARNING: wrong integral of erfc function\n")
 
-        scale = charge / analytic * 0.5
-
-        self._density[:] += density * scale
+        return EnvironSparseField(
+            self.grid,
+            indices,
+            values,
+            self.background,
+            self.label,
+        )
 
-    def _compute_gradient(self) -> None:
+    def evaluate(self, name: str, r: ndarray, r2: ndarray) -> ndarray:
         """docstring"""
 
-        r, r2 = self.grid.get_min_distance(self.pos, self.dim, self.axis)
+        if name.startswith('log'): return self._evaluate_log(name[3:], r, r2)
+
         dist = np.sqrt(r2)
         arg = (dist - self.width) / self.spread
 
-        mask = dist > FUNC_TOL
+        # erfc is only evaluated on the transition shell
+        shell = np.abs(arg) <= ERFC_TOL
+
+        charge = self._charge()
+        analytic = self._erfc_volume()
+
+        if name == 'density':
+
+            density = np.where(arg < 0., 2., 0.)
+            density[shell] = sp.erfc(arg[shell])
+
+            return density[np.newaxis] * charge / analytic * 0.5
+
+        scale = charge / analytic / SQRTPI / self.spread
+
+        mask = shell & (dist > FUNC_TOL)
 
         r = r[:, mask]
         dist = dist[mask]
         arg = arg[mask]
 
-        self._gradient = EnvironGradient(self.grid, label=self.label)
+        exp = np.exp(-arg**2) * scale
 
-        gradient = np.zeros(self._gradient.shape)
-        gradient[:, mask] = -np.exp(-arg**2) * r / dist
+        if name == 'gradient':
 
-        charge = self._charge()
-        analytic = self._erfc_volume()
-        scale = charge / analytic / SQRTPI / self.spread
+            values = np.zeros((3, mask.size))
+            values[:, mask] = -exp * r / dist
 
-        self._gradient[:, mask] += gradient[:, mask] * scale
+        elif name == 'laplacian':
 
-    def _compute_laplacian(self) -> None:
-        """docstring"""
+            values = np.zeros((1, mask.size))
 
-        _, r2 = self.grid.get_min_distance(self.pos, self.dim, self.axis)
-        dist = np.sqrt(r2)
-        arg = (dist - self.width) / self.spread
+            if self.dim == 0:
+                values[:, mask] = -exp * (1 / dist - arg / self.spread) * 2
+            elif self.dim == 1:
+                values[:, mask] = -exp * (1 / dist - 2 * arg / self.spread)
+            elif self.dim == 2:
+                values[:, mask] = exp * arg / self.spread * 2
+            else:
+                raise ValueError("unexpected system dimensions")
 
-        mask = dist > FUNC_TOL
+        elif name == 'hessian':
 
-        dist = dist[mask]
-        arg = arg[mask]
+            values = np.zeros((9, mask.size))
 
-        self._laplacian = EnvironDensity(self.grid, label=self.label)
+            outer = np.reshape(np.einsum('i...,j...->ij...', -r, r),
+                               (9, dist.size))
+            outer *= 1 / dist + 2 * arg / self.spread
+            outer += dist * np.identity(3).flatten()[:, None]
 
-        laplacian = np.zeros(self._laplacian.shape)
+            values[:, mask] = -exp * outer / dist**2
 
-        exp = np.exp(-arg**2)
+        elif name == 'derivative':
+
+            values = np.zeros((1, mask.size))
+            values[:, mask] = -exp
 
-        if self.dim == 0:
-            laplacian[mask] = -exp * (1 / dist - arg / self.spread) * 2
-        elif self.dim == 1:
-            laplacian[mask] = -exp * (1 / dist - 2 * arg / self.spread)
-        elif self.dim == 2:
-            laplacian[mask] = exp * arg / self.spread * 2
         else:
-            raise ValueError("unexpected system dimensions")
+            raise ValueError(f"unexpected quantity {name}")
 
-        charge = self._charge()
-        analytic = self._erfc_volume()
-        scale = charge / analytic / SQRTPI / self.spread
+        return values
 
-        self._laplacian[mask] += laplacian[mask] * scale
+    def _evaluate_log(self, name: str, r: ndarray, r2: ndarray) -> ndarray:
+        """Logarithm of a scaled erf function, or one of its derivatives.
 
-    def _compute_hessian(self) -> None:
-        """docstring"""
+        With y = (width - dist) / spread, the function is volume * erfc(y)
+        / 2. Its logarithm and the log-derivatives are written in terms of
+        the scaled erfcx(y) = exp(y^2) erfc(y), so they stay finite (and
+        accurate) deep inside the function, where erfc(y) underflows. The
+        logarithm is given relative to its background, log(volume).
+        """
+        if self.kind != 4:
+            raise ValueError("logarithms only defined for scaled erf")
 
-        r, r2 = self.grid.get_min_distance(self.pos, self.dim, self.axis)
         dist = np.sqrt(r2)
-        arg = (dist - self.width) / self.spread
+        y = (self.width - dist) / self.spread
+
+        if name == 'density':
+
+            values = np.empty((1, y.size))
+
+            inner = y > 0.
+            values[:, inner] = np.log(sp.erfcx(y[inner])) - y[inner]**2
+            values[:, ~inner] = np.log(sp.erfc(y[~inner]))
+
+            return values + np.log(0.5)
 
         mask = dist > FUNC_TOL
 
         r = r[:, mask]
         dist = dist[mask]
-        arg = arg[mask]
+        y = y[mask]
 
-        self._hessian = EnvironHessian(self.grid, label=self.label)
+        # first and second radial derivatives of the logarithm
+        first = 2. / (SQRTPI * self.spread * sp.erfcx(y))
+        second = first * (2. * y / self.spread - first)
 
-        hessian = np.zeros(self._hessian.shape)
+        if name == 'gradient':
 
-        shape = np.count_nonzero(mask)
-        outer = np.reshape(np.einsum('i...,j...->ij...', -r, r), (9, shape))
-        outer *= 1 / dist + 2 * arg / self.spread
-        outer += dist * np.identity(3).flatten()[:, None]
+            values = np.zeros((3, mask.size))
+            values[:, mask] = first * r / dist
 
-        hessian[:, mask] = -np.exp(-arg**2) * outer / dist**2
-
-        charge = self._charge()
-        analytic = self._erfc_volume()
-        scale = charge / analytic / SQRTPI / self.spread
+        elif name == 'laplacian':
 
-        self._hessian[:, mask] += hessian[:, mask] * scale
+            values = np.zeros((1, mask.size))
+            values[:, mask] = second + (2 - self.dim) * first / dist
 
-    def _compute_derivative(self) -> None:
-        """docstring"""
+        elif name == 'hessian':
 
-        _, r2 = self.grid.get_min_distance(self.pos, self.dim, self.axis)
-        dist = np.sqrt(r2)
-        arg = (dist - self.width) / self.spread
+            values = np.zeros((9, mask.size))
 
-        mask = dist > FUNC_TOL
+            outer = np.reshape(np.einsum('i...,j...->ij...', r, r),
+                               (9, dist.size)) / dist**2
+            outer *= second - first / dist
+            outer += first / dist * np.identity(3).flatten()[:, None]
 
-        arg = arg[mask]
+            values[:, mask] = outer
 
-        self._derivative = EnvironDensity(self.grid, label=self.label)
+        else:
+            raise ValueError(f"unexpected quantity log{name}")
 
-        derivative = np.zeros(self._derivative.shape)
-        derivative[mask] = -np.exp(-arg**2)
+        return values
 
-        integral = np.sum(self._derivative) * \
-                   self.grid.volume / self.grid.nnrR * 0.5
+    def _get_enclosed(self) -> Tuple[ndarray, ndarray, ndarray]:
+        """Points enclosed by the outer surface of the transition shell.
 
-        charge = self._charge()
-        analytic = self._erfc_volume()
+        Returns their flat grid indices, distance vectors and squared
+        distances.
+        """
+        index, r, r2 = self._get_support(self.cutoff)
 
-        if np.abs((integral - analytic) / analytic > 1e-4):
-            print("\nWARNING: wrong integral of erfc function\n")
+        if isinstance(index[0], slice):
+            indices = np.arange(self.grid.nnr).reshape(self.grid.nr)
+        else:
+            indices = np.ravel_multi_index(index, self.grid.nr)
 
-        scale = charge / analytic / SQRTPI / self.spread
+        enclosed = r2 <= self.cutoff**2
 
-        self._derivative[mask] += derivative[mask] * scale
+        return indices[enclosed], r[:, enclosed], r2[enclosed]
 
     def _charge(self) -> float:
         """docstring"""
@@ -1,11 +1,17 @@
-from typing import Optional
+from typing import Dict, Optional, Tuple, Type
 from numpy import ndarray
 
 import numpy as np
 from abc import ABC, abstractmethod
 
 from ...domains import EnvironGrid
-from .. import EnvironDensity, EnvironGradient, EnvironHessian
+from .. import (
+    EnvironField,
+    EnvironDensity,
+    EnvironGradient,
+    EnvironHessian,
+    EnvironSparseField,
+)
 
 KINDS = {
     1: 'gaussian',
@@ -49,6 +55,8 @@ class EnvironFunction(ABC):
         self._hessian: Optional[EnvironHessian] = None
         self._derivative: Optional[EnvironDensity] = None
 
+        self._local: Dict[str, EnvironSparseField] = {}
+
     @property
     def kind(self) -> int:
         """docstring"""
@@ -95,6 +103,22 @@ class EnvironFunction(ABC):
             raise ValueError(f"wrong spread for {self.kind} function")
         self.__spread = spread
 
+    @property
+    def cutoff(self) -> float:
+        """Distance beyond which the function is negligible (or constant)."""
+        return np.inf
+
+    @property
+    def background(self) -> float:
+        """Constant value of the density away from the function."""
+        return 0.
+
+    @property
+    def is_local(self) -> bool:
+        """Whether the function is confined to a sub-box of the cell."""
+        return self.dim == 0 and np.isfinite(self.cutoff) and \
+            self.grid.get_local_axes(self.pos, self.cutoff) is not None
+
     @property
     def density(self) -> EnvironDensity:
         """docstring"""
@@ -132,6 +156,63 @@ class EnvironFunction(ABC):
         self._laplacian = None
         self._hessian = None
         self._derivative = None
+        self._local = {}
+
+    def local(self, name: str) -> EnvironSparseField:
+        """Sparse form of the density or of one of its derivatives.
+
+        Functions without a dedicated sparse evaluation are computed on the
+        full grid and stored sparsely.
+        """
+        if name not in self._local:
+            self._local[name] = self._compute_local(name)
+        return self._local[name]
+
+    def evaluate(self, name: str, r: ndarray, r2: ndarray) -> ndarray:
+        """Values of a quantity at the given (flat) distances.
+
+        Returns an array of shape (rank, npoints). The parameters of the
+        function, but not its position, enter the evaluation, so that
+        functions sharing them can be evaluated together.
+        """
+        raise NotImplementedError(
+            f"not implemented for {KINDS[self.kind]} functions")
+
+    def _compute_local(self, name: str) -> EnvironSparseField:
+        """docstring"""
+        return EnvironSparseField.from_dense(getattr(self, name))
+
+    def _materialize(self, cls: Type[EnvironField], name: str) -> EnvironField:
+        """Full grid field of a quantity from its sparse form."""
+        return self.local(name).to_dense(cls)
+
+    def _get_support(self, cutoff: float) -> Tuple[tuple, ndarray, ndarray]:
+        """Grid points that may lie within `cutoff` of the function.
+
+        Returns their indices in full grid fields, with their distance
+        vectors and squared distances. Point-like functions are restricted
+        to the periodic sub-box enclosing the cutoff sphere (if smaller
+        than the cell), others cover the full grid.
+        """
+        if self.dim == 0:
+            local = self.grid.get_local_distance(self.pos, cutoff)
+            if local is not None: return local
+
+        r, r2 = self.grid.get_min_distance(self.pos, self.dim, self.axis)
+        return (slice(None), ) * 3, r, r2
+
+    def _compute_on_support(
+        self,
+        cls: Type[EnvironField],
+        name: str,
+    ) -> EnvironField:
+        """Full grid field of a quantity, evaluated within the cutoff."""
+        index, r, r2 = self._get_support(self.cutoff)
+        field = cls(self.grid, label=self.label)
+        values = self.evaluate(name, r.reshape(3, -1), r2.ravel())
+        shape = field.shape[:-3] + r2.shape
+        field[(Ellipsis, *index)] += values.reshape(shape)
+        return field
 
     @abstractmethod
     def _compute_density(self) -> None:
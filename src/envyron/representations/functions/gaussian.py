@@ -1,3 +1,5 @@
+from numpy import ndarray
+
 import numpy as np
 
 from ...utils.constants import SQRTPI
@@ -8,46 +10,45 @@ from . import EnvironFunction, EXP_TOL
 class EnvironGaussian(EnvironFunction):
     """docstring"""
 
-    def _compute_density(self) -> None:
+    @property
+    def cutoff(self) -> float:
         """docstring"""
+        return self.spread * np.sqrt(EXP_TOL)
 
-        _, r2 = self.grid.get_min_distance(self.pos, self.dim, self.axis)
-        r2 /= self.spread**2
-
-        mask = r2 <= EXP_TOL
-
-        r2 = r2[mask]
-
-        self._density = EnvironDensity(self.grid, label=self.label)
-
-        density = np.zeros(self._density.shape)
-        density[mask] = np.exp(-r2)
-
-        scale = self._get_scale_factor()
-
-        self._density[mask] += density[mask] * scale
+    def _compute_density(self) -> None:
+        """docstring"""
+        self._density = self._compute_on_support(EnvironDensity, 'density')
 
     def _compute_gradient(self) -> None:
         """docstring"""
+        self._gradient = self._compute_on_support(EnvironGradient, 'gradient')
+
+    def evaluate(self, name: str, r: ndarray, r2: ndarray) -> ndarray:
+        """docstring"""
 
         spread2 = self.spread**2
 
-        r, r2 = self.grid.get_min_distance(self.pos, self.dim, self.axis)
-        r2 /= spread2
+        r2 = r2 / spread2
 
         mask = r2 <= EXP_TOL
 
-        r = r[:, mask]
-        r2 = r2[mask]
+        exp = np.exp(-r2[mask]) * self._get_scale_factor()
+
+        if name == 'density':
 
-        self._gradient = EnvironGradient(self.grid, label=self.label)
+            values = np.zeros((1, mask.size))
+            values[:, mask] = exp
 
-        gradient = np.zeros(self._gradient.shape)
-        gradient[:, mask] = -np.exp(-r2) * r
+        elif name == 'gradient':
 
-        scale = self._get_scale_factor() * 2.0 / spread2
+            values = np.zeros((3, mask.size))
+            values[:, mask] = -exp * r[:, mask] * 2.0 / spread2
+
+        else:
+            raise NotImplementedError(
+                f"{name} not implemented for gaussian functions")
 
-        self._gradient[:, mask] += gradient[:, mask] * scale
+        return values
 
     def _get_scale_factor(self) -> float:
         """docstring"""
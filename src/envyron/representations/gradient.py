@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from typing import Optional
 from numpy import ndarray
+from numpy.typing import DTypeLike
 
 import numpy as np
 
@@ -14,16 +15,31 @@ from . import EnvironField, EnvironDensity
 class EnvironGradient(EnvironField):
     """docstring"""
 
+    _modulus: Optional[EnvironDensity]
+
     def __new__(
         cls,
         grid: EnvironGrid,
         data: Optional[ndarray] = None,
         label: str = '',
+        dtype: DTypeLike = None,
     ) -> EnvironGradient:
-        obj = super().__new__(cls, grid, rank=3, data=data, label=label)
+        obj = super().__new__(
+            cls,
+            grid,
+            rank=3,
+            data=data,
+            label=label,
+            dtype=dtype,
+        )
         obj._modulus = None
         return obj
 
+    def touch(self) -> None:
+        """docstring"""
+        super().touch()
+        self._modulus = None
+
     @property
     def modulus(self) -> EnvironDensity:
         if self._modulus is None: self.compute_modulus()
@@ -31,9 +47,10 @@ class EnvironGradient(EnvironField):
 
     def compute_modulus(self) -> None:
         """docstring"""
+        modulus = np.einsum('l...,l...', self, self)
         self._modulus = EnvironDensity(
             self.grid,
-            data=np.sqrt(np.sum(self**2, 0)),
+            data=np.sqrt(modulus, out=modulus),
             label=f"{self.label or 'gradient'}_modulus",
         )
         self._modulus.compute_charge()
@@ -42,10 +59,16 @@ class EnvironGradient(EnvironField):
     def scalar_product(
         self,
         gradient: EnvironGradient,
+        out: Optional[EnvironDensity] = None,
     ) -> EnvironDensity:
         """docstring"""
-        data = np.einsum('l...,l...', self, gradient)
-        return EnvironDensity(self.grid, data=data)
+        if out is None:
+            data = np.einsum('l...,l...', self, gradient)
+            return EnvironDensity(self.grid, data=data)
+
+        np.einsum('l...,l...', self, gradient, out=out, casting='same_kind')
+        out.touch()
+        return out
 
     @multimethod
     def scalar_product(
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from typing import Optional
 from numpy import ndarray
+from numpy.typing import DTypeLike
 
 import numpy as np
 
@@ -12,16 +13,31 @@ from . import EnvironField, EnvironDensity, EnvironGradient
 class EnvironHessian(EnvironField):
     """docstring"""
 
+    _trace: Optional[EnvironDensity]
+
     def __new__(
         cls,
         grid: EnvironGrid,
         data: Optional[ndarray] = None,
         label: str = '',
+        dtype: DTypeLike = None,
     ) -> EnvironHessian:
-        obj = super().__new__(cls, grid, rank=9, data=data, label=label)
+        obj = super().__new__(
+            cls,
+            grid,
+            rank=9,
+            data=data,
+            label=label,
+            dtype=dtype,
+        )
         obj._trace = None
         return obj
 
+    def touch(self) -> None:
+        """docstring"""
+        super().touch()
+        self._trace = None
+
     @property
     def trace(self) -> EnvironDensity:
         if self._trace is None: self._compute_trace()
@@ -38,8 +54,21 @@ class EnvironHessian(EnvironField):
     def scalar_gradient_product(
         self,
         gradient: EnvironGradient,
+        out: Optional[EnvironGradient] = None,
     ) -> EnvironGradient:
         """docstring"""
         reshaped = self.reshape(3, 3, *self.grid.nr)
-        data = np.einsum('ml...,l...->m...', reshaped, gradient)
-        return EnvironGradient(self.grid, data=data)
+
+        if out is None:
+            data = np.einsum('ml...,l...->m...', reshaped, gradient)
+            return EnvironGradient(self.grid, data=data)
+
+        np.einsum(
+            'ml...,l...->m...',
+            reshaped,
+            gradient,
+            out=out,
+            casting='same_kind',
+        )
+        out.touch()
+        return out
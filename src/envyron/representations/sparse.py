@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+from typing import Type
+from numpy import ndarray
+
+import numpy as np
+
+from ..domains.cell import EnvironGrid
+from . import EnvironField
+
+
+class EnvironSparseField:
+    """
+    Field known on a subset of the grid points.
+
+    Stores the flat (C-order) grid indices of the points and the values of
+    the `rank` components there. Everywhere else the field is equal to a
+    constant background. Full grid fields are only built on demand, while
+    accumulation into existing full grid fields is done by scatter.
+    """
+
+    def __init__(
+        self,
+        grid: EnvironGrid,
+        indices: ndarray,
+        values: ndarray,
+        background: float = 0.,
+        label: str = '',
+    ) -> None:
+        self.grid = grid
+        self.indices = np.asarray(indices, dtype=np.intp)
+        self.values = np.atleast_2d(values)
+        self.background = background
+        self.label = label
+
+    @property
+    def rank(self) -> int:
+        """docstring"""
+        return self.values.shape[0]
+
+    @property
+    def size(self) -> int:
+        """Number of stored points."""
+        return self.indices.size
+
+    @property
+    def nbytes(self) -> int:
+        """docstring"""
+        return self.indices.nbytes + self.values.nbytes
+
+    @classmethod
+    def from_dense(
+        cls,
+        field: EnvironField,
+        background: float = 0.,
+    ) -> EnvironSparseField:
+        """Sparse copy of the points of a field that differ from background."""
+        flat = flat_view(field, field.rank)
+        indices = np.flatnonzero(np.any(flat != background, axis=0))
+        return cls(
+            field.grid,
+            indices,
+            flat[:, indices] - background,
+            background,
+            field.label,
+        )
+
+    def to_dense(self, cls: Type[EnvironField]) -> EnvironField:
+        """docstring"""
+        field = cls(self.grid, label=self.label)
+        self.scatter_add(field)
+        return field
+
+    def gather(self, field: EnvironField) -> ndarray:
+        """Values of a full grid field at the stored points."""
+        return flat_view(field, self.rank)[:, self.indices]
+
+    def scatter_add(self, field: EnvironField, scale: float = 1.) -> None:
+        """Add (a multiple of) the sparse field to a full grid field."""
+        if self.background != 0.: field += self.background * scale
+        # stored indices are unique, no need for unbuffered np.add.at
+        flat_view(field, self.rank)[:, self.indices] += self.values * scale
+        field.touch()
+
+    def scatter_multiply(self, field: EnvironField) -> None:
+        """Multiply a full grid field by the sparse field."""
+        flat = flat_view(field, self.rank)
+        local = flat[:, self.indices]
+        if self.background != 1.: field *= self.background
+        flat[:, self.indices] = local * (self.values + self.background)
+        field.touch()
+
+
+def flat_view(field: ndarray, rank: int) -> ndarray:
+    """Flat view of the components of a full grid field (never a copy)."""
+    flat = np.asarray(field).view()
+    flat.shape = (rank, -1)
+    return flat
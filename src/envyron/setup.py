@@ -1,10 +1,14 @@
+import numpy as np
+
 from envyron.utils.constants import BOHR_RADIUS, RYDBERG
 
 from envyron.io.input.input import Input
 from envyron.domains import EnvironGrid
-from envyron.cores import FFTCore, Analytic1DCore, CoreContainer
+from envyron.cores import FFTCore, Analytic1DCore, CoreContainer, \
+    FFTBackend, WorkspacePool, get_fft_backend
 from envyron.solvers import DirectSolver, GradientSolver, FixedPointSolver, \
-    NewtonSolver, IterativeSolver, ElectrostaticSolverSetup
+    NewtonSolver, IterativeSolver, MixedPrecisionSolver, \
+    ElectrostaticSolverSetup
 
 
 class Setup:
@@ -41,6 +45,7 @@ class Setup:
         """docstring"""
         self.restart = self.input.control.restart
         self.threshold = self.input.control.threshold
+        self.density_threshold = self.input.control.density_threshold
         self.nskip = self.input.control.nskip
 
     def _set_simulation_flags(self) -> None:
@@ -152,20 +157,35 @@ class Setup:
 
     def _set_numerical_flags(self) -> None:
         """docstring"""
-        self.lfft = self.lelectrostatic or \
+        self.lreciprocalions = self.input.ions.reciprocal and \
+            (self.lsmearedions or self.lcoredensity)
+
+        self.lfft = self.lelectrostatic or self.lreciprocalions or \
             (self.lboundary and self.input.solvent.deriv_core == 'fft')
 
         self.l1da = self.lperiodic and self.input.pbc.core == '1da'
 
         self.need_inner = self.input.electrostatics.inner_solver != 'none'
 
+        # boundaries, dielectrics and preconditioners in single precision
+        self.lmixedprecision = self.input.control.precision == 'mixed'
+
     def init_cell(self, cell: EnvironGrid):
         """docstring"""
+        cell.distance_budget = self.input.control.distance_budget
         self.cell = cell
 
     def init_numerical(self, use_internal_pbc_corr):
         """docstring"""
-        if self.lfft: self.fft = FFTCore(self.cell)
+        if self.lfft:
+            backend = self._get_fft_backend()
+            budget = self.input.control.kernel_budget
+            self.fft = FFTCore(self.cell, budget, backend=backend)
+            if self.lmixedprecision:
+                self.fft_single = FFTCore(self.cell,
+                                          budget,
+                                          backend=backend,
+                                          dtype=np.float32)
         if self.l1da:
             self.analytic1d = Analytic1DCore(self.cell, self.input.pbc.dim,
                                              self.input.pbc.axis)
@@ -173,27 +193,49 @@ class Setup:
         if self.lelectrostatic: self._set_electrostatics()
         self.has_numerical_setup = True
 
+    def _get_fft_backend(self) -> FFTBackend:
+        """Select the FFT library (and its threading) from the input."""
+        control = self.input.control
+        kwargs = {}
+        if control.fft_backend == 'pyfftw':
+            kwargs['wisdom_file'] = control.fft_wisdom
+        return get_fft_backend(control.fft_backend, control.fft_threads,
+                               **kwargs)
+
     def _set_core_containers(
         self,
         use_internal_pbc_corr: bool,
     ):
         """docstring"""
-        self.environment_core = CoreContainer('environment')
+        # temporary fields shared by all solvers and boundaries
+        self.workspace = WorkspacePool()
+        self.environment_core = CoreContainer('environment',
+                                              workspace=self.workspace)
         # Derivative core
         if self.lboundary:
             if self.input.solvent.deriv_core == 'fft':
-                self.environment_core.derivatives = self.fft
+                if self.lmixedprecision:
+                    self.environment_core.derivatives = self.fft_single
+                else:
+                    self.environment_core.derivatives = self.fft
             else:
                 raise ValueError('Unexpected derivative core')
         # Electrostatic cores
         if self.lelectrostatic:
             self.reference_core = CoreContainer('reference',
                                                 use_internal_pbc_corr,
-                                                electrostatics_core=self.fft)
+                                                electrostatics_core=self.fft,
+                                                workspace=self.workspace)
             if self.input.electrostatics.core == 'fft':
                 self.environment_core.electrostatics = self.fft
             else:
                 raise ValueError('Unexpected electrostatic core')
+            if self.lmixedprecision:
+                self.single_core = CoreContainer(
+                    'single',
+                    derivatives_core=self.fft_single,
+                    electrostatics_core=self.fft_single,
+                    workspace=self.workspace)
         # Correction cores
         if self.lperiodic:
             if self.input.pbc.core == '1da':
@@ -210,13 +252,29 @@ class Setup:
             local_outer_solver = self.direct
         elif self.input.electrostatics.solver in ('cg', 'sd'):
             if self.input.electrostatics.solver == 'cg': self.lconjugate = True
-            self.gradient = GradientSolver(
-                self.environment_core, self.direct,
-                self.input.electrostatics.preconditioner, self.lconjugate,
-                self.input.electrostatics.maxstep,
-                self.input.electrostatics.tol,
-                self.input.electrostatics.auxiliary)
-            local_outer_solver = self.gradient
+            if self.lmixedprecision:
+                # single precision solver refined in double precision
+                self.single_direct = DirectSolver(self.single_core)
+                self.gradient = GradientSolver(
+                    self.single_core, self.single_direct,
+                    self.input.electrostatics.preconditioner, self.lconjugate,
+                    self.input.electrostatics.maxstep,
+                    self.input.electrostatics.tol,
+                    self.input.electrostatics.auxiliary)
+                self.mixed = MixedPrecisionSolver(
+                    self.environment_core, self.direct, self.gradient,
+                    self.input.electrostatics.maxstep,
+                    self.input.electrostatics.tol,
+                    self.input.electrostatics.auxiliary)
+                local_outer_solver = self.mixed
+            else:
+                self.gradient = GradientSolver(
+                    self.environment_core, self.direct,
+                    self.input.electrostatics.preconditioner,
+                    self.lconjugate, self.input.electrostatics.maxstep,
+                    self.input.electrostatics.tol,
+                    self.input.electrostatics.auxiliary)
+                local_outer_solver = self.gradient
         elif self.input.electrostatics.solver == 'fixed-point':
             self.fixedpoint = FixedPointSolver(
                 self.environment_core, self.direct,
@@ -295,7 +353,7 @@ class Setup:
             pass
         elif setup.problem in ('generalized', 'linpb', 'linmodpb', 'pb',
                                'modpb'):
-            if type(setup.solver) == GradientSolver:
+            if type(setup.solver) in (GradientSolver, MixedPrecisionSolver):
                 if self.input.electrostatics.preconditioner == 'sqrt':
                     self.need_factsqrt = True
                 elif self.input.electrostatics.preconditioner in ('left',
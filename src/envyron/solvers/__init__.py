@@ -5,3 +5,4 @@ from .iterative import IterativeSolver
 from .gradient import GradientSolver
 from .fixedpoint import FixedPointSolver
 from .newton import NewtonSolver
+from .mixed import MixedPrecisionSolver
@@ -3,6 +3,7 @@ from ..cores import CoreContainer
 
 from ..representations import EnvironDensity, EnvironGradient
 from ..physical import EnvironCharges
+from ..utils.constants import E2
 
 from dftpy.functional.hartree import Hartree
 
@@ -17,7 +18,19 @@ class DirectSolver(ElectrostaticSolver):
 
     @ElectrostaticSolver.charge_operation
     def poisson(self, density: EnvironDensity, *args, **kwargs) -> EnvironDensity:
+        out = kwargs.get('out')
+
+        # use the container's core, so that its precision is honored
+        if self.cores.has_electrostatics:
+            potential = self.cores.electrostatics.poisson(density, out=out)
+            potential *= E2
+            return potential
+
         res = Hartree.compute(density=density, calcType={"V"}).potential
 
+        if out is not None:
+            out[:] = 2. * res
+            return out
+
         # Hartree to Rydberg
         return 2.*res
@@ -45,35 +45,41 @@ class FixedPointSolver(IterativeSolver):
         eps = dielectric.epsilon
         gradlog = dielectric.gradlogepsilon
 
-        rhozero = EnvironDensity(grid, np.array((1 - eps) * density / eps))
-        residuals = EnvironDensity(grid)
-        gradpoisson = EnvironDensity(grid)
+        workspace = self.cores.workspace
+        rhozero, residuals, gradpoisson = (
+            workspace.checkout(EnvironDensity, grid) for _ in range(3))
+
+        try:
+            rhozero[:] = (1 - eps) * density / eps
+
+            for _ in range(self.maxiter):
+                rhotot[:] = density + rhoiter + rhozero
+
+                gradpoisson[:] = self.direct.grad_poisson(
+                    rhotot,
+                    electrolyte,
+                    semiconductor,
+                )
+
+                residuals[:] = gradlog.scalar_product(gradpoisson) / FPI / E2 - rhoiter
+                rhoiter[:] += self.mixing * residuals
+
+                if residuals.euclidean_norm() < self.tol: break
+
+            else:
+                raise ValueError('The fixed point iteration did not converge')
 
-        for _ in range(self.maxiter):
             rhotot[:] = density + rhoiter + rhozero
 
-            gradpoisson[:] = self.direct.grad_poisson(
+            potential = self.direct.poisson(
                 rhotot,
                 electrolyte,
                 semiconductor,
             )
 
-            residuals[:] = gradlog.scalar_product(gradpoisson) / FPI / E2 - rhoiter
-            rhoiter[:] += self.mixing * residuals
-
-            if residuals.euclidean_norm() < self.tol: break
-
-        else:
-            raise ValueError('The fixed point iteration did not converge')
-
-        rhotot[:] = density + rhoiter + rhozero
-
-        potential = self.direct.poisson(
-            rhotot,
-            electrolyte,
-            semiconductor,
-        )
+            rhotot[:] = rhozero + rhoiter
 
-        rhotot[:] = rhozero + rhoiter
+        finally:
+            workspace.release(rhozero, residuals, gradpoisson)
 
         return potential
@@ -13,8 +13,6 @@ from ..physical import (
     EnvironCharges,
 )
 
-from copy import deepcopy
-
 class GradientSolver(IterativeSolver):
     """docstring"""
 
@@ -50,44 +48,55 @@ class GradientSolver(IterativeSolver):
             semiconductor = kwargs['semiconductor']
 
         grid = dielectric.epsilon.grid
+        dtype = self.dtype
+
+        phi = EnvironDensity(grid, dtype=dtype)
+
+        workspace = self.cores.workspace
+        inv_sqrt, r, z, p, Ap, w = (
+            workspace.checkout(EnvironDensity, grid, dtype) for _ in range(6))
 
-        phi = EnvironDensity(grid)
+        try:
+            inv_sqrt[:] = np.reciprocal(np.sqrt(dielectric.epsilon))
+            r[:] = density
 
-        inv_sqrt = EnvironDensity(
-            grid,
-            np.reciprocal(np.sqrt(dielectric.epsilon)),
-        )
+            rzold = 0.0
 
-        r = EnvironDensity(grid, deepcopy(density))
-        z = EnvironDensity(grid)
-        p = EnvironDensity(grid)
-        Ap = EnvironDensity(grid)
+            for i in range(self.maxiter):
+                np.multiply(r, inv_sqrt, out=w)
+                self.direct.poisson(w, out=z)
+                z *= inv_sqrt
+                rznew = z.scalar_product(r)
 
-        rzold = 0.0
+                if abs(rzold) > 1.e-30 and self.conjugate:
+                    beta = rznew / rzold
+                else:
+                    beta = 0.0
 
-        for i in range(self.maxiter):
-            z[:] = self.direct.poisson(r * inv_sqrt) * inv_sqrt
-            rznew = z.scalar_product(r)
+                rzold = rznew
 
-            if abs(rzold) > 1.e-30 and self.conjugate:
-                beta = rznew / rzold
-            else:
-                beta = 0.0
+                p *= beta
+                p += z
 
-            rzold = rznew
+                Ap *= beta
+                Ap += r
+                np.multiply(z, dielectric.factsqrt, out=w)
+                Ap += w
 
-            p[:] = z + beta * p
-            Ap[:] = z * dielectric.factsqrt + r + beta * Ap
+                pAp = p.scalar_product(Ap)
 
-            pAp = p.scalar_product(Ap)
+                alpha = rznew / pAp
+                np.multiply(p, alpha, out=w)
+                phi += w
+                np.multiply(Ap, alpha, out=w)
+                r -= w
 
-            alpha = rznew / pAp
-            phi += alpha * p
-            r -= alpha * Ap
+                delta_en = r.euclidean_norm()
 
-            delta_en = r.euclidean_norm()
+                if delta_en <= self.tol: break
 
-            if delta_en <= self.tol: break
+        finally:
+            workspace.release(inv_sqrt, r, z, p, Ap, w)
 
         return phi
 
@@ -0,0 +1,90 @@
+from typing import Optional
+
+import numpy as np
+
+from ..utils.constants import FPI, E2
+from ..representations import EnvironDensity
+from ..cores import CoreContainer
+from ..physical import (
+    EnvironDielectric,
+    EnvironElectrolyte,
+    EnvironSemiconductor,
+)
+from . import DirectSolver, IterativeSolver
+
+
+class MixedPrecisionSolver(IterativeSolver):
+    """
+    Iterative refinement around a (lower precision) iterative solver.
+
+    The wrapped solver computes corrections to the potential from the
+    residual charge, typically in single precision. The potential and the
+    residual of the generalized Poisson equation are accumulated in double
+    precision with the cores of this solver, so the converged potential is
+    as accurate as a full double precision solution.
+    """
+
+    def __init__(
+        self,
+        cores: CoreContainer,
+        direct: DirectSolver,
+        solver: IterativeSolver,
+        maxiter: Optional[int] = 10,
+        tol: Optional[float] = 1.0e-7,
+        auxiliary: Optional[str] = '',
+        reduction: Optional[float] = 1.0e-3,
+    ) -> None:
+        super().__init__(cores, direct, maxiter, tol, auxiliary)
+        self.solver = solver
+        self.reduction = reduction
+
+    @IterativeSolver.charge_operation
+    def generalized(
+        self,
+        density: EnvironDensity,
+        dielectric: EnvironDielectric,
+        electrolyte: EnvironElectrolyte = None,
+        semiconductor: EnvironSemiconductor = None,
+    ) -> EnvironDensity:
+        """docstring"""
+        grid = density.grid
+
+        phi = EnvironDensity(grid, dtype=np.float64)
+
+        residual = self.cores.workspace.checkout(EnvironDensity, grid)
+        tol = self.solver.tol
+        try:
+            residual[:] = density
+
+            for _ in range(self.maxiter):
+                norm = residual.euclidean_norm()
+
+                if norm <= self.tol: break
+
+                # the inner solver only needs to reduce the current residual
+                self.solver.tol = max(self.tol, self.reduction * norm)
+
+                phi += self.solver.generalized(residual, dielectric)
+
+                residual[:] = density - self._operator(phi, dielectric)
+
+        finally:
+            self.solver.tol = tol
+            self.cores.workspace.release(residual)
+
+        return phi
+
+    def _operator(
+        self,
+        phi: EnvironDensity,
+        dielectric: EnvironDielectric,
+    ) -> EnvironDensity:
+        """-div(epsilon grad(phi)) / 4 pi e2, evaluated in double precision.
+
+        Uses the same square-root splitting as the gradient solver, so that
+        the refinement and the inner solver share one discrete operator.
+        """
+        core = self.cores.electrostatics
+        sqrt = np.sqrt(dielectric.epsilon.astype(np.float64))
+        laplacian = core.laplacian(EnvironDensity(phi.grid, sqrt * phi))
+        return dielectric.factsqrt * phi - sqrt * laplacian / FPI / E2
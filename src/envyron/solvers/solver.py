@@ -1,5 +1,7 @@
 from abc import ABC
 
+import numpy as np
+
 from multimethod import multimethod
 
 from ..cores import CoreContainer
@@ -70,6 +72,13 @@ class ElectrostaticSolver(ABC, ElectrostaticSolverMeta):
     def __init__(self, cores: CoreContainer) -> None:
         self.cores = cores
 
+    @property
+    def dtype(self) -> np.dtype:
+        """Floating point type of the electrostatics core."""
+        if self.cores.has_electrostatics:
+            return self.cores.electrostatics.dtype
+        return np.dtype(np.float64)
+
     @multimethod
     def poisson(
         self,
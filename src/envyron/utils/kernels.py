@@ -0,0 +1,119 @@
+"""
+Fused elementwise kernels for the boundary and dielectric profiles.
+
+Each kernel produces all of its outputs in a single pass over the grid. If
+numba is installed, the kernels are compiled (and run in parallel), else
+they fall back to numpy expressions sharing their common subexpressions.
+Arrays are flat (1D) views of the full grid fields.
+"""
+
+from typing import Tuple
+from numpy import ndarray
+
+import numpy as np
+
+from .constants import TPI
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+def switching_function(
+    rho: ndarray,
+    band: ndarray,
+    rhomax: float,
+    factor: float,
+    switch: ndarray,
+    dswitch: ndarray,
+    d2switch: ndarray,
+) -> None:
+    """Electronic switching function and its derivatives on a band.
+
+    Only the points with the given (flat) indices are written.
+    """
+    if numba is None:
+        _switching_function_numpy(rho, band, rhomax, factor, switch, dswitch,
+                                  d2switch)
+    else:
+        _switching_function_numba(rho, band, rhomax, factor, switch, dswitch,
+                                  d2switch)
+
+
+def dielectric_profiles(
+    switch: ndarray,
+    backgrounds: Tuple[ndarray, ...],
+    epsilons: Tuple[ndarray, ...],
+    depsilons: Tuple[ndarray, ...],
+    dlogepsilons: Tuple[ndarray, ...],
+) -> None:
+    """Permittivities exp(log(eps0) * (1 - s)) and their derivatives.
+
+    One profile is computed for each background, all in the same pass over
+    the switch. The derivatives are taken with respect to the switch.
+    """
+    if numba is None:
+        _dielectric_profiles_numpy(switch, backgrounds, epsilons, depsilons,
+                                   dlogepsilons)
+    else:
+        _dielectric_profiles_numba(switch, backgrounds, epsilons, depsilons,
+                                   dlogepsilons)
+
+
+def _switching_function_numpy(rho, band, rhomax, factor, switch, dswitch,
+                              d2switch):
+    """docstring"""
+    rho = rho[band]
+    arg = np.log(rhomax / rho) * (TPI / factor)
+    sin = np.sin(arg)
+    vers = 1. - np.cos(arg)
+    rho *= factor
+
+    switch[band] = 1. - (arg - sin) / TPI
+    dswitch[band] = vers / rho
+    d2switch[band] = -(TPI * sin + factor * vers) / rho**2
+
+
+def _dielectric_profiles_numpy(switch, backgrounds, epsilons, depsilons,
+                               dlogepsilons):
+    """docstring"""
+    complement = 1. - switch
+    for background, epsilon, depsilon, dlogepsilon in zip(
+            backgrounds, epsilons, depsilons, dlogepsilons):
+        np.log(background, out=dlogepsilon, casting='same_kind')
+        np.multiply(dlogepsilon, complement, out=epsilon, casting='same_kind')
+        np.exp(epsilon, out=epsilon)
+        np.negative(dlogepsilon, out=dlogepsilon)
+        np.multiply(epsilon, dlogepsilon, out=depsilon, casting='same_kind')
+
+
+if numba is not None:
+
+    @numba.njit(parallel=True, cache=True)
+    def _switching_function_numba(rho, band, rhomax, factor, switch, dswitch,
+                                  d2switch):
+        """docstring"""
+        scale = TPI / factor
+        for n in numba.prange(band.size):
+            i = band[n]
+            arg = np.log(rhomax / rho[i]) * scale
+            sin = np.sin(arg)
+            vers = 1. - np.cos(arg)
+            r = rho[i] * factor
+            switch[i] = 1. - (arg - sin) / TPI
+            dswitch[i] = vers / r
+            d2switch[i] = -(TPI * sin + factor * vers) / (r * r)
+
+    @numba.njit(parallel=True, cache=True)
+    def _dielectric_profiles_numba(switch, backgrounds, epsilons, depsilons,
+                                   dlogepsilons):
+        """docstring"""
+        for i in numba.prange(switch.size):
+            complement = 1. - switch[i]
+            for k in range(len(backgrounds)):
+                log = np.log(backgrounds[k][i])
+                eps = np.exp(log * complement)
+                epsilons[k][i] = eps
+                depsilons[k][i] = -eps * log
+                dlogepsilons[k][i] = -log
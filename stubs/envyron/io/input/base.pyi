@@ -10,6 +10,7 @@ from envyron.io.input.types import (
     ElectrostaticSolver as ElectrostaticSolver,
     EntropyScheme as EntropyScheme,
     Environment as Environment,
+    FFTLibrary as FFTLibrary,
     FloatGE1 as FloatGE1,
     FloatVector as FloatVector,
     IntGT1 as IntGT1,
@@ -20,6 +21,7 @@ from envyron.io.input.types import (
     PBCCore as PBCCore,
     PBCCorrection as PBCCorrection,
     PositiveFloatList as PositiveFloatList,
+    Precision as Precision,
     Preconditioner as Preconditioner,
     RadiusMode as RadiusMode,
     ScreeningType as ScreeningType,
@@ -80,10 +82,17 @@ class ControlModel(BaseModel):
     restart: bool
     verbosity: NonNegativeInt
     threshold: NonNegativeFloat
+    density_threshold: NonNegativeFloat
     nskip: NonNegativeInt
     ecut: NonNegativeFloat
     nrep: NonNegativeIntVector
     need_electrostatic: bool
+    fft_backend: FFTLibrary
+    fft_threads: NonNegativeInt
+    fft_wisdom: Optional[str]
+    kernel_budget: Optional[NonNegativeInt]
+    distance_budget: Optional[NonNegativeInt]
+    precision: Precision
 
 
 class EnvironmentModel(BaseModel):
@@ -100,6 +109,7 @@ class IonsModel(BaseModel):
     atomicspread: PositiveFloatList
     corespread: NonNegativeFloatList
     solvationrad: PositiveFloatList
+    reciprocal: bool
 
 
 class SystemModel(BaseModel):
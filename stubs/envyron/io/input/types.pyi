@@ -23,6 +23,8 @@ ElectrostaticCore: Any
 ElectrostaticInnerSolver: Any
 PBCCorrection: Any
 PBCCore: Any
+FFTLibrary: Any
+Precision: Any
 
 
 def int_list(value: List[Any]) -> List[int]:
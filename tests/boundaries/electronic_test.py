@@ -0,0 +1,103 @@
+from pytest import mark, raises
+
+from envyron.boundaries import ElectronicBoundary
+from envyron.cores import CoreContainer, FFTCore
+from envyron.physical import EnvironDielectric, EnvironElectrons
+from envyron.utils.constants import TPI
+
+import numpy as np
+
+RHOMIN = 1e-4
+RHOMAX = 5e-3
+
+
+@mark.parametrize('cubic_cell', [(36, 12.)], indirect=['cubic_cell'])
+def test_band(cubic_cell):
+    """docstring"""
+    _, r2 = cubic_cell.get_min_distance(np.array([6.5, 6., 6.]))
+    electrons = EnvironElectrons(cubic_cell)
+    electrons.update(np.exp(-r2 / 2.) * 0.3 - 1e-5)
+
+    core = FFTCore(cubic_cell)
+    cores = CoreContainer('electronic', derivatives_core=core)
+    boundary = ElectronicBoundary(RHOMIN, RHOMAX, electrons, 'electronic',
+                                  True, True, True, 'chain', cores,
+                                  cubic_cell)
+    boundary.density[:] = electrons.density
+    boundary._build()
+
+    # full grid reference of the switching function and the chain rule
+    rho = np.array(electrons.density)
+    factor = np.log(RHOMAX / RHOMIN)
+    mask = (RHOMIN < rho) & (rho < RHOMAX)
+    arg = np.log(RHOMAX / np.where(mask, rho, 1.)) * TPI / factor
+    switch = np.where(mask, 1. - (arg - np.sin(arg)) / TPI, rho >= RHOMAX)
+    dswitch = np.where(mask, (1. - np.cos(arg)) / rho / factor, 0.)
+    d2switch = np.where(
+        mask,
+        -(TPI * np.sin(arg) + factor * (1. - np.cos(arg))) / (rho * factor)**2,
+        0.,
+    )
+
+    derivatives = core.derivatives(electrons.density, ['gradient', 'hessian'])
+    gradient = derivatives['gradient']
+    hessian = np.reshape(derivatives['hessian'], (3, 3, *rho.shape))
+    laplacian = np.einsum('ii...', hessian) * dswitch + \
+        np.einsum('i...,i...', gradient, gradient) * d2switch
+
+    assert boundary.band.size < cubic_cell.nnr / 8
+    assert np.allclose(boundary.switch, switch, atol=1e-12)
+    assert np.allclose(boundary.dswitch * RHOMIN, dswitch * RHOMIN)
+    assert np.allclose(boundary.d2switch * RHOMIN**2, d2switch * RHOMIN**2)
+    assert np.allclose(boundary.gradient, gradient * dswitch, atol=1e-12)
+    assert np.allclose(boundary.laplacian, laplacian, atol=1e-10)
+
+
+@mark.parametrize('cubic_cell', [(24, 12.)], indirect=['cubic_cell'])
+def test_unchanged_density(cubic_cell):
+    """docstring"""
+    _, r2 = cubic_cell.get_min_distance(np.array([6., 6., 6.]))
+    rho = np.exp(-r2 / 2.) * 0.3
+
+    electrons = EnvironElectrons(cubic_cell, threshold=1e-3)
+    cores = CoreContainer('electronic', derivatives_core=FFTCore(cubic_cell))
+    boundary = ElectronicBoundary(RHOMIN, RHOMAX, electrons, 'electronic',
+                                  True, False, False, 'chain', cores,
+                                  cubic_cell)
+    dielectric = EnvironDielectric(boundary, 78.3)
+
+    def step(density):
+        electrons.updating = True
+        electrons.update(density)
+        boundary.update()
+        dielectric.update()
+        electrons.updating = False
+        return np.array(boundary.switch), np.array(dielectric.epsilon)
+
+    switch, epsilon = step(rho)
+    assert boundary.update_status == 2
+
+    # changes below the threshold are not passed on
+    for scale in (1.000001, 1.000002):
+        assert all(np.array_equal(a, b)
+                   for a, b in zip(step(rho * scale), (switch, epsilon)))
+        assert not electrons.changed and boundary.update_status == 0
+
+    # while larger changes are
+    assert not np.array_equal(step(rho * 1.01)[0], switch)
+    assert electrons.changed and boundary.update_status == 2
+
+
+@mark.parametrize('cubic_cell', [(16, 12.)], indirect=['cubic_cell'])
+def test_failed_build_releases_workspace(cubic_cell):
+    """docstring"""
+    electrons = EnvironElectrons(cubic_cell)
+    cores = CoreContainer('electronic', derivatives_core=FFTCore(cubic_cell))
+    boundary = ElectronicBoundary(RHOMIN, RHOMAX, electrons, 'electronic',
+                                  True, True, True, 'lowmem', cores,
+                                  cubic_cell)
+
+    with raises(ValueError):
+        boundary._build()
+
+    assert cores.workspace.nbytes_in_use == 0
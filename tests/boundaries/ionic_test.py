@@ -0,0 +1,85 @@
+from pytest import fixture, mark
+
+from envyron.boundaries import IonicBoundary
+from envyron.cores import CoreContainer, FFTCore
+from envyron.physical import EnvironIons
+from envyron.representations import EnvironDensity
+
+import numpy as np
+
+COORDS = np.array([
+    [8.0, 8.0, 8.0],
+    [9.4, 8.0, 8.3],
+    [7.2, 9.1, 8.0],
+    [11.0, 10.0, 9.0],
+    [12.0, 11.0, 9.5],
+])
+
+
+@fixture
+def ionic_boundary():
+    """Create a lowmem ionic boundary around five ions"""
+
+    def _ionic_boundary(cell, coords):
+        ions = EnvironIons(5, 2, [0, 1, 1, 0, 1], ['O', 'H'], [6., 1.],
+                           [0.5, 0.5], [0.5, 0.5], [0., 0.], 'uff', False,
+                           True, False, cell)
+        ions.coords[:] = coords
+        cores = CoreContainer('ionic', derivatives_core=FFTCore(cell))
+        boundary = IonicBoundary(1.12, 0.5, ions, 'ionic', True, True, True,
+                                 'lowmem', cores, cell)
+        boundary._build()
+        return boundary
+
+    return _ionic_boundary
+
+
+@mark.parametrize('hexagonal_cell', [(40, 16, 1.)],
+                  indirect=['hexagonal_cell'])
+def test_incremental_build(hexagonal_cell, ionic_boundary):
+    """docstring"""
+    boundary = ionic_boundary(hexagonal_cell, COORDS)
+
+    moved = COORDS.copy()
+    moved[1] += [0.3, -0.2, 0.1]
+    moved[3] += [0.5, 0.2, -0.4]
+
+    for coords in (moved, COORDS, moved):
+        boundary.ions.coords[:] = coords
+        boundary._build()
+
+    expected = ionic_boundary(hexagonal_cell, moved)
+
+    for name in ('switch', 'gradient', 'laplacian', 'dsurface'):
+        assert np.allclose(getattr(boundary, name),
+                           getattr(expected, name),
+                           atol=1e-12)
+
+
+@mark.parametrize('hexagonal_cell', [(40, 16, 1.)],
+                  indirect=['hexagonal_cell'])
+def test_dboundary_dions_all(hexagonal_cell, ionic_boundary):
+    """docstring"""
+    boundary = ionic_boundary(hexagonal_cell, COORDS)
+
+    r, _ = hexagonal_cell.get_min_distance(np.zeros(3))
+    de_dboundary = EnvironDensity(hexagonal_cell, data=np.cos(r[0]) + r[1])
+
+    forces = boundary.dboundary_dions_all(de_dboundary)
+    assert forces.shape == (3, len(COORDS))
+
+    for i in (0, 3):
+        partial = boundary.dboundary_dions(i)
+        assert np.allclose(-partial.scalar_product(de_dboundary),
+                           forces[:, i],
+                           atol=1e-12)
+
+        for j, step in enumerate(np.eye(3) * 1e-4):
+            energies = []
+            for sign in (1., -1.):
+                displaced = COORDS.copy()
+                displaced[i] += sign * step
+                switch = ionic_boundary(hexagonal_cell, displaced).switch
+                energies.append(switch.scalar_product(de_dboundary))
+            derivative = (energies[0] - energies[1]) / 2e-4
+            assert np.isclose(forces[j, i], -derivative, atol=1e-6)
@@ -0,0 +1,265 @@
+from pytest import fixture, importorskip, mark, approx, raises
+
+from envyron.cores import FFTCore, get_fft_backend
+from envyron.domains.cell import EnvironGrid
+from envyron.representations import (
+    EnvironDensity,
+    EnvironGradient,
+    EnvironHessian,
+)
+from envyron.representations.functions import (
+    EnvironGaussian,
+    FunctionContainer,
+)
+
+import numpy as np
+
+
+@fixture
+def gaussian_density():
+    """Create a normalized gaussian density centered in a given cell"""
+
+    def _gaussian_density(cell: EnvironGrid, spread: float):
+        center = np.sum(cell.lattice, axis=0) * 0.5
+        _, r2 = cell.get_min_distance(center)
+        data = np.exp(-r2 / spread**2) / (np.sqrt(np.pi) * spread)**3
+        return EnvironDensity(cell, data=data, label='gaussian')
+
+    return _gaussian_density
+
+
+@mark.parametrize('cubic_cell', [(32, 12), (40, 15)], indirect=['cubic_cell'])
+class TestFFTCore:
+    """docstring"""
+
+    def test_gradient(self, cubic_cell, gaussian_density):
+        """docstring"""
+        spread = 1.5
+        density = gaussian_density(cubic_cell, spread)
+        center = np.sum(cubic_cell.lattice, axis=0) * 0.5
+        r, _ = cubic_cell.get_min_distance(center)
+        expected = -2 * r / spread**2 * density
+        gradient = FFTCore(cubic_cell).gradient(density)
+        assert isinstance(gradient, EnvironGradient)
+        assert np.allclose(gradient, expected, atol=1e-6)
+
+    def test_laplacian_is_hessian_trace(self, cubic_cell, gaussian_density):
+        """docstring"""
+        core = FFTCore(cubic_cell)
+        density = gaussian_density(cubic_cell, 1.5)
+        laplacian = core.laplacian(density)
+        hessian = core.hessian(density)
+        assert np.allclose(hessian.trace, laplacian)
+        assert np.allclose(hessian[1], hessian[3])
+
+    def test_divergence_of_gradient(self, cubic_cell, gaussian_density):
+        """docstring"""
+        core = FFTCore(cubic_cell)
+        density = gaussian_density(cubic_cell, 1.5)
+        divergence = core.divergence(core.gradient(density))
+        assert np.allclose(divergence, core.laplacian(density), atol=1e-6)
+
+    def test_poisson(self, cubic_cell, gaussian_density):
+        """docstring"""
+        core = FFTCore(cubic_cell)
+        density = gaussian_density(cubic_cell, 1.5)
+        potential = core.poisson(density)
+        assert potential.integral() == approx(0., abs=1e-8)
+        average = density.integral() / cubic_cell.volume
+        assert np.allclose(core.laplacian(potential),
+                           -4 * np.pi * (density - average))
+        assert np.allclose(core.grad_poisson(density),
+                           core.gradient(potential))
+
+    def test_derivatives(self, cubic_cell, gaussian_density):
+        """docstring"""
+        core = FFTCore(cubic_cell)
+        density = gaussian_density(cubic_cell, 1.5)
+        derivatives = core.derivatives(
+            density,
+            ('gradient', 'modulus', 'laplacian', 'hessian'),
+        )
+        gradient = core.gradient(density)
+        assert np.allclose(derivatives['gradient'], gradient)
+        assert np.allclose(derivatives['modulus'], gradient.modulus)
+        assert np.allclose(derivatives['hessian'], core.hessian(density))
+        assert np.allclose(derivatives['laplacian'], core.laplacian(density))
+        assert set(core.derivatives(density, ('laplacian', ))) == \
+            {'laplacian'}
+        with raises(ValueError):
+            core.derivatives(density, ('divergence', ))
+
+    def test_reciprocal_cache(self, cubic_cell, gaussian_density):
+        """docstring"""
+        core = FFTCore(cubic_cell)
+        density = gaussian_density(cubic_cell, 1.5)
+        density_g = core._forward(density)
+        assert core._forward(density) is not density_g
+        density.cache_reciprocal = True
+        density_g = core._forward(density)
+        assert core._forward(density) is density_g
+        assert FFTCore(cubic_cell)._forward(density) is not density_g
+        assert core._forward(density * 2.) is not density_g
+        density[0, 0, 0] = 1.
+        assert core._forward(density) is not density_g
+        gradient = core.gradient(density)
+        density *= 2.
+        assert np.allclose(core.gradient(density), 2 * gradient)
+        density[:].fill(0.)
+        density.touch()
+        assert np.allclose(core.gradient(density), 0.)
+
+    def test_kernel_cache(self, cubic_cell, gaussian_density):
+        """docstring"""
+        core = FFTCore(cubic_cell)
+        density = gaussian_density(cubic_cell, 1.5)
+        core.grad_poisson(density)
+        assert set(core._kernels) == {'gradient', 'coulomb'}
+        assert core.kernel_nbytes == (3 * 16 + 8) * core.gg.size
+        assert core.gg.shape == (*cubic_cell.nr[:2], cubic_cell.nr[2] // 2 + 1)
+
+    def test_kernel_budget(self, cubic_cell, gaussian_density):
+        """docstring"""
+        budget = 8 * cubic_cell.nnr // 2
+        cached = FFTCore(cubic_cell)
+        limited = FFTCore(cubic_cell, kernel_budget=budget)
+        density = gaussian_density(cubic_cell, 1.5)
+        assert np.allclose(limited.grad_poisson(density),
+                           cached.grad_poisson(density))
+        assert limited.kernel_nbytes <= budget
+        assert 'gradient' not in limited._kernels
+
+    def test_cell_change(self, cubic_cell, gaussian_density):
+        """docstring"""
+        core = FFTCore(cubic_cell)
+        density = gaussian_density(cubic_cell, 1.5)
+        core.laplacian(density)
+        old = core._kernels['laplacian']
+        cubic_cell.cell[:] *= 2.
+        core.laplacian(density)
+        assert np.allclose(core._kernels['laplacian'], old / 4)
+
+    def test_full_spectrum(self, cubic_cell, gaussian_density):
+        """docstring"""
+        half = FFTCore(cubic_cell)
+        full = FFTCore(cubic_cell, rfft=False)
+        density = gaussian_density(cubic_cell, 1.5)
+        assert full.gg.shape == tuple(cubic_cell.nr)
+        for operator in ('gradient', 'laplacian', 'hessian', 'poisson',
+                         'grad_poisson'):
+            assert np.allclose(
+                getattr(half, operator)(density),
+                getattr(full, operator)(density),
+                atol=1e-8,
+            )
+        gradient = half.gradient(density)
+        assert np.allclose(half.divergence(gradient),
+                           full.divergence(gradient))
+
+    def test_convolution(self, cubic_cell, gaussian_density):
+        """docstring"""
+        core = FFTCore(cubic_cell)
+        density = gaussian_density(cubic_cell, 1.)
+        other = gaussian_density(cubic_cell, 1.5)
+        convolution = core.convolution(density, other)
+        assert convolution.integral() == approx(
+            density.integral() * other.integral())
+        gradient = core.convolution(density, core.gradient(other))
+        assert np.allclose(gradient, core.gradient(convolution), atol=1e-8)
+        hessian = core.convolution(density, core.hessian(other))
+        assert np.allclose(hessian, core.hessian(convolution), atol=1e-8)
+        asymmetric = core.hessian(other)
+        asymmetric[1] = 0.
+        hessian = core.convolution(density, asymmetric)
+        assert np.allclose(hessian[1], 0.)
+        assert np.allclose(hessian[3], core.hessian(convolution)[3], atol=1e-8)
+
+    def test_out_buffers(self, cubic_cell, gaussian_density):
+        """docstring"""
+        core = FFTCore(cubic_cell)
+        density = gaussian_density(cubic_cell, 1.5)
+        other = gaussian_density(cubic_cell, 1.)
+        gradient = EnvironGradient(cubic_cell)
+        laplacian = EnvironDensity(cubic_cell)
+        hessian = EnvironHessian(cubic_cell)
+        assert core.gradient(density, out=gradient) is gradient
+        assert np.allclose(gradient, core.gradient(density))
+        assert core.hessian(density, out=hessian) is hessian
+        assert np.allclose(hessian, core.hessian(density))
+        assert core.poisson(density, out=laplacian) is laplacian
+        assert np.allclose(laplacian, core.poisson(density))
+        assert core.convolution(other, density, out=laplacian) is laplacian
+        assert np.allclose(laplacian, core.convolution(other, density))
+        assert core.convolution(other, hessian, out=hessian) is hessian
+        assert np.allclose(hessian.trace, core.laplacian(laplacian))
+        out = {'gradient': gradient, 'laplacian': laplacian}
+        derivatives = core.derivatives(density, ('gradient', 'laplacian'), out)
+        assert derivatives['gradient'] is gradient
+        assert derivatives['laplacian'] is laplacian
+        assert np.allclose(laplacian, core.laplacian(density))
+        assert np.allclose(gradient.modulus, core.gradient(density).modulus)
+        product = EnvironDensity(cubic_cell)
+        assert gradient.scalar_product(gradient, out=product) is product
+        assert np.allclose(product, gradient.modulus**2)
+
+    def test_single_precision(self, cubic_cell, gaussian_density):
+        """docstring"""
+        double = FFTCore(cubic_cell)
+        single = FFTCore(cubic_cell, dtype=np.float32)
+        density = gaussian_density(cubic_cell, 1.5)
+        for operator in ('gradient', 'laplacian', 'hessian', 'poisson'):
+            result = getattr(single, operator)(density)
+            assert result.dtype == np.float32
+            assert np.allclose(result,
+                               getattr(double, operator)(density),
+                               atol=1e-5)
+        assert single.kernel_nbytes * 2 == double.kernel_nbytes
+
+
+@mark.parametrize('backend', ['numpy', 'scipy', 'pyfftw'])
+@mark.parametrize('cubic_cell', [(24, 10)], indirect=['cubic_cell'])
+def test_backends(backend, cubic_cell, gaussian_density):
+    """docstring"""
+    if backend == 'pyfftw': importorskip('pyfftw')
+    reference = FFTCore(cubic_cell)
+    core = FFTCore(cubic_cell, backend=get_fft_backend(backend, threads=2))
+    density = gaussian_density(cubic_cell, 1.5)
+    for _ in range(2):
+        assert np.allclose(core.hessian(density), reference.hessian(density))
+        assert np.allclose(core.poisson(density), reference.poisson(density))
+
+
+@mark.parametrize('rfft', [True, False])
+@mark.parametrize('hexagonal_cell', [(30, 10, 1.2)],
+                  indirect=['hexagonal_cell'])
+def test_structure_factor(hexagonal_cell, gaussian_density, rfft):
+    """docstring"""
+    ions = FunctionContainer(hexagonal_cell)
+    for pos, spread, charge in [((1., 2., 3.), 1., 2.), ((5., 6., 7.), 1., 2.),
+                                ((8., 2., 9.), 1.3, -1.)]:
+        ions.append(
+            EnvironGaussian(hexagonal_cell, 1, 0, 0, 0., spread, charge,
+                            np.array(pos)))
+
+    core = FFTCore(hexagonal_cell, rfft=rfft)
+    assert np.allclose(core.gaussians(ions), ions.density(), atol=1e-6)
+    assert np.allclose(core.grad_gaussians(ions), ions.gradient(), atol=1e-6)
+
+    rho = gaussian_density(hexagonal_cell, 2.)
+    potential = core.poisson(rho)
+    force = core.force(rho, ions)
+
+    def energy(ion):
+        return np.sum(potential * core.gaussians(ions[[ion]])) * \
+               hexagonal_cell.dV
+
+    step = 1e-4
+    for i, ion in enumerate(ions):
+        for k in range(3):
+            ion.pos[k] += step
+            forward = energy(i)
+            ion.pos[k] -= 2 * step
+            backward = energy(i)
+            ion.pos[k] += step
+            assert force[i, k] == approx(-(forward - backward) / 2 / step,
+                                         abs=1e-7)
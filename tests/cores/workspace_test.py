@@ -0,0 +1,58 @@
+from pytest import mark, raises
+
+from envyron.cores import WorkspacePool
+from envyron.representations import EnvironDensity, EnvironGradient
+
+import numpy as np
+
+
+@mark.parametrize('unitary_cell', [4], indirect=['unitary_cell'])
+class TestWorkspacePool:
+    """docstring"""
+
+    def test_reuse(self, unitary_cell):
+        """docstring"""
+        pool = WorkspacePool()
+        density = pool.checkout(EnvironDensity, unitary_cell)
+        density[:] = 1.
+        pool.release(density)
+        assert pool.checkout(EnvironDensity, unitary_cell) is density
+        assert np.all(density == 0.)
+        assert pool.nbytes == density.nbytes
+
+    def test_keys(self, unitary_cell):
+        """docstring"""
+        pool = WorkspacePool()
+        density = pool.checkout(EnvironDensity, unitary_cell)
+        pool.release(density)
+        gradient = pool.checkout(EnvironGradient, unitary_cell)
+        single = pool.checkout(EnvironDensity, unitary_cell, np.float32)
+        assert isinstance(gradient, EnvironGradient)
+        assert single is not density and single.dtype == np.float32
+        assert pool.nbytes == density.nbytes * 4 + single.nbytes
+
+    def test_peak(self, unitary_cell):
+        """docstring"""
+        pool = WorkspacePool()
+        fields = [pool.checkout(EnvironDensity, unitary_cell) for _ in range(3)]
+        pool.release(*fields)
+        assert pool.nbytes_in_use == 0
+        assert pool.peak_nbytes == 3 * fields[0].nbytes
+        pool.checkout(EnvironDensity, unitary_cell)
+        assert pool.peak_nbytes == 3 * fields[0].nbytes
+        with raises(ValueError):
+            pool.release(fields[0])
+        pool.clear()
+        assert pool.nbytes == fields[0].nbytes
+
+    def test_release(self, unitary_cell):
+        """docstring"""
+        pool = WorkspacePool()
+        density = pool.checkout(EnvironDensity, unitary_cell)
+        with raises(ValueError):
+            pool.release(EnvironDensity(unitary_cell))
+        pool.release(density)
+        with raises(ValueError):
+            pool.release(density)
+        assert pool.nbytes_in_use == 0
+        assert pool.checkout(EnvironDensity, unitary_cell) is density
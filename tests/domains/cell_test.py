@@ -200,3 +200,80 @@ class TestMinDistance():
 
         assert np.allclose(expected_r, obtained_r)
         assert np.allclose(expected_r2, obtained_r2)
+
+
+@mark.parametrize('cubic_cell', [(10, 5)], indirect=['cubic_cell'])
+class TestDistanceCache:
+    """docstring"""
+
+    def test_hits_and_misses(self, cubic_cell):
+        """docstring"""
+        origin = np.array([1., 2., 3.])
+        r, r2 = cubic_cell.get_min_distance(origin)
+        assert cubic_cell.get_min_distance(origin.copy())[1] is r2
+        assert cubic_cell.get_min_distance(origin, 1, 2)[1] is not r2
+        assert (cubic_cell.distance_hits, cubic_cell.distance_misses) == (1, 2)
+        assert not r.flags.writeable and not r2.flags.writeable
+
+    def test_budget(self, cubic_cell):
+        """docstring"""
+        nbytes = 4 * cubic_cell.nnr * 8
+        cubic_cell.distance_budget = 2 * nbytes
+        origins = [np.full(3, x) for x in (1., 2., 3.)]
+        for origin in origins:
+            cubic_cell.get_min_distance(origin)
+        assert cubic_cell.distance_nbytes == 2 * nbytes
+        cubic_cell.get_min_distance(origins[0])
+        assert cubic_cell.distance_misses == 4
+        cubic_cell.get_min_distance(origins[2])
+        assert cubic_cell.distance_hits == 1
+        cubic_cell.distance_budget = nbytes // 2
+        cubic_cell.get_min_distance(origins[1])
+        assert cubic_cell.distance_nbytes == 2 * nbytes
+
+    def test_cell_change(self, cubic_cell):
+        """docstring"""
+        origin = np.zeros(3)
+        _, r2 = cubic_cell.get_min_distance(origin)
+        cubic_cell.cell[:] *= 2.
+        assert cubic_cell.get_min_distance(origin)[1] is not r2
+        assert cubic_cell.distance_misses == 2
+
+    def test_skewed_cell(self, cubic_cell):
+        """docstring"""
+        assert cubic_cell.orthorhombic
+        cubic_cell.cell[1, 0] = 2.
+        assert not cubic_cell.orthorhombic
+        with raises(ValueError):
+            cubic_cell.get_min_distance_axes(np.zeros(3))
+
+
+@mark.parametrize('dim', [0, 1, 2])
+@mark.parametrize('axis', [0, 1, 2])
+def test_orthorhombic_min_distance(dim, axis):
+    """docstring"""
+    rotation = np.linalg.qr(np.arange(1., 10.).reshape(3, 3)**2)[0]
+    at = np.diag([4., 5., 6.]).dot(rotation)
+    cell = EnvironGrid(at, np.array([8, 10, 12]))
+    assert cell.orthorhombic
+    assert not EnvironGrid(at + 0.1, np.array([8, 10, 12])).orthorhombic
+    for origin in (np.array([0.3, -1.7, 2.2]), np.array([9.1, 0.4, -3.3])):
+        r, r2 = cell.get_min_distance(origin, dim, axis)
+        t = cell.r - origin[:, None, None, None]
+        expected_r, expected_r2 = \
+            cell._apply_minimum_image_convension(t, dim, axis)
+        assert np.allclose(r, expected_r)
+        assert np.allclose(r2, expected_r2)
+
+
+@mark.parametrize('hexagonal_cell', [(2, 1, 1)], indirect=['hexagonal_cell'])
+@mark.parametrize('cubic_cell', [(4, 3)], indirect=['cubic_cell'])
+def test_separable_axes(cubic_cell, hexagonal_cell):
+    """docstring"""
+    for cell in (cubic_cell, hexagonal_cell):
+        assert np.allclose(cell.to_cartesian(cell.axes), cell.r)
+    s = cubic_cell.get_min_distance_axes(np.array([0.5, 1., 1.5]), 1, 2)
+    assert all(si.ndim == 1 for si in s)
+    assert np.all(s[2] == 0.) and np.all(np.abs(s[0]) <= 0.5)
+    with raises(ValueError):
+        hexagonal_cell.get_min_distance_axes(np.zeros(3))
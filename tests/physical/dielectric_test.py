@@ -0,0 +1,87 @@
+from pytest import mark
+
+from envyron.boundaries import ElectronicBoundary
+from envyron.cores import CoreContainer, FFTCore
+from envyron.physical import EnvironDielectric, EnvironElectrons
+from envyron.representations import EnvironDensity
+from envyron.utils.constants import E2, FPI
+
+import numpy as np
+
+FIELDS = ('epsilon', 'depsilon', 'gradlogepsilon', 'gradient', 'factsqrt')
+
+
+@mark.parametrize('cubic_cell', [(24, 12.)], indirect=['cubic_cell'])
+def test_shared_boundary(cubic_cell):
+    """docstring"""
+    _, r2 = cubic_cell.get_min_distance(np.array([6., 6., 6.]))
+    electrons = EnvironElectrons(cubic_cell)
+    electrons.update(np.exp(-r2 / 2.) * 0.3)
+
+    cores = CoreContainer('electronic', derivatives_core=FFTCore(cubic_cell))
+    boundary = ElectronicBoundary(1e-4, 5e-3, electrons, 'electronic', True,
+                                  True, False, 'chain', cores, cubic_cell)
+    boundary.density[:] = electrons.density
+    boundary._build()
+
+    static = EnvironDielectric(boundary, 78.3, True, True)
+    optical = EnvironDielectric(boundary, 1.776, True, True, share=static)
+    assert static.group is optical.group
+
+    static.of_boundary()
+    version = optical.epsilon.version
+    optical.of_boundary()
+    assert optical.epsilon.version == version
+
+    for shared in (static, optical):
+        alone = EnvironDielectric(boundary, shared.constant, True, True)
+        alone.of_boundary()
+
+        for name in FIELDS:
+            assert np.allclose(getattr(shared, name), getattr(alone, name))
+
+
+@mark.parametrize('cubic_cell', [(24, 12.)], indirect=['cubic_cell'])
+def test_potential_gradient(cubic_cell):
+    """docstring"""
+    _, r2 = cubic_cell.get_min_distance(np.array([6., 6., 6.]))
+    electrons = EnvironElectrons(cubic_cell)
+    electrons.update(np.exp(-r2 / 2.) * 0.3)
+
+    core = FFTCore(cubic_cell)
+    cores = CoreContainer('electronic', derivatives_core=core)
+    boundary = ElectronicBoundary(1e-4, 5e-3, electrons, 'electronic', True,
+                                  False, False, 'chain', cores, cubic_cell)
+    boundary.density[:] = electrons.density
+    boundary._build()
+
+    dielectric = EnvironDielectric(boundary, 78.3)
+    dielectric.of_boundary()
+
+    calls = []
+    gradient = core.gradient
+
+    def counted(*args, **kwargs):
+        calls.append(args[0])
+        return gradient(*args, **kwargs)
+
+    core.gradient = counted
+
+    potential = EnvironDensity(cubic_cell, data=np.exp(-r2 / 4.))
+    de_dboundary = EnvironDensity(cubic_cell)
+
+    dielectric.of_potential(electrons.density, potential)
+    dielectric.de_dboundary(potential, de_dboundary)
+    assert len(calls) == 1
+
+    # writes through the potential invalidate its gradient
+    potential[:] *= 2.
+    dielectric.de_dboundary(potential, de_dboundary)
+    assert len(calls) == 2
+
+    expected = -gradient(potential).modulus**2 * dielectric.depsilon * \
+        0.5 / FPI / E2
+    de_dboundary[:] = 0.
+    dielectric.de_dboundary(potential, de_dboundary)
+    assert len(calls) == 2
+    assert np.allclose(de_dboundary, expected)
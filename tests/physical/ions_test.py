@@ -0,0 +1,46 @@
+from pytest import mark
+
+from envyron.cores import FFTCore
+from envyron.physical import EnvironIons
+
+import numpy as np
+
+COORDS = np.array([
+    [6.0, 6.0, 6.0],
+    [7.4, 6.0, 6.3],
+    [5.2, 7.1, 6.0],
+    [2.0, 3.0, 4.0],
+    [9.0, 9.0, 9.0],
+])
+
+
+@mark.parametrize('reciprocal', [False, True])
+@mark.parametrize('cubic_cell', [(40, 12)], indirect=['cubic_cell'])
+def test_incremental_update(cubic_cell, reciprocal):
+    """docstring"""
+
+    def ions(*steps):
+        core = FFTCore(cubic_cell) if reciprocal else None
+        ions = EnvironIons(5, 2, [0, 1, 1, 0, 1], ['O', 'H'], [6., 1.],
+                           [0.5, 0.5], [0.4, 0.4], [1., 1.], 'uff', False,
+                           True, True, cubic_cell, core)
+        for coords in steps:
+            ions.update(coords.copy())
+            for function in ions.core_electrons:
+                function.gradient
+        return ions
+
+    moved = COORDS.copy()
+    moved[1] += 0.2
+    moved[3] -= [0.1, 0.3, 0.]
+
+    updated = ions(COORDS, moved, COORDS, moved)
+    expected = ions(moved)
+
+    assert np.allclose(updated.density, expected.density, atol=1e-12)
+    assert np.allclose(updated.core_density, expected.core_density, atol=1e-12)
+
+    for i in range(5):
+        assert np.allclose(updated.core_electrons[i].gradient,
+                           expected.core_electrons[i].gradient,
+                           atol=1e-12)
@@ -68,4 +68,20 @@ class TestUniformDensity:
     def test_hexagonal_gradient(self, hexagonal_cell, N, uniform_density):
         """"""
         density = uniform_density(hexagonal_cell, N)
-        assert np.sum(density.gradient()) == approx(0.)
\ No newline at end of file
+        assert np.sum(density.gradient()) == approx(0.)
+
+
+@mark.parametrize('cubic_cell', [(10, 20)], indirect=['cubic_cell'])
+@mark.parametrize('hexagonal_cell', [(10, 20, 3)], indirect=['hexagonal_cell'])
+def test_multipoles(cubic_cell, hexagonal_cell):
+    """"""
+    origin = np.array([1.3, -4.2, 7.5])
+    for cell in (cubic_cell, hexagonal_cell):
+        data = np.random.default_rng(0).random(cell.nr)
+        density = EnvironDensity(cell, data)
+        density.compute_multipoles(origin)
+        r, _ = cell.get_min_distance(origin)
+        dipole = np.einsum('ijk,lijk', density, r) * cell.dV
+        quadrupole = np.einsum('ijk,lijk', density, r**2) * cell.dV
+        assert np.allclose(density.dipole, dipole)
+        assert np.allclose(density.quadrupole, quadrupole)
@@ -0,0 +1,50 @@
+from pytest import fixture, mark
+
+from envyron.representations.functions import (
+    EnvironERFC,
+    EnvironGaussian,
+    FunctionContainer,
+)
+
+import numpy as np
+
+
+@fixture
+def functions():
+    """Gaussians and soft spheres, some spanning the cell"""
+
+    def _functions(cell, batch_size):
+        container = FunctionContainer(cell, batch_size)
+        rng = np.random.default_rng(7)
+        center = np.sum(cell.lattice, axis=0)
+        for spread in (0.8, 3.):
+            for pos in rng.random((3, 3)) * center:
+                container.append(
+                    EnvironGaussian(cell, 1, 0, 0, 0., spread, 2., pos))
+        for width in (1.5, 6.):
+            for pos in rng.random((3, 3)) * center:
+                container.append(
+                    EnvironERFC(cell, 4, 0, 0, width, 0.5, 1., pos))
+        return container
+
+    return _functions
+
+
+@mark.parametrize('batch_size', [1, 10000, 2**19])
+@mark.parametrize('hexagonal_cell', [(20, 10, 1.5)],
+                  indirect=['hexagonal_cell'])
+def test_batch(hexagonal_cell, functions, batch_size):
+    """docstring"""
+    container = functions(hexagonal_cell, batch_size)
+    assert len(container._groups()) == 4
+    assert not all(function.is_local for function in container)
+
+    for name in ('density', 'gradient'):
+        expected = sum(getattr(function, name) for function in container)
+        assert np.allclose(getattr(container, name)(), expected, atol=1e-12)
+
+    for name in ('laplacian', 'hessian', 'derivative'):
+        expected = sum(getattr(function, name) for function in container[6:])
+        assert np.allclose(getattr(container[6:], name)(),
+                           expected,
+                           atol=1e-12)
@@ -0,0 +1,72 @@
+from pytest import mark
+
+from envyron.representations.functions import EnvironERFC
+from envyron.utils.constants import SQRTPI
+
+import numpy as np
+import scipy.special as sp
+
+
+def full_grid(sphere):
+    """Reference soft sphere evaluated on the full grid"""
+    r, r2 = sphere.grid.get_min_distance(sphere.pos)
+    dist = np.sqrt(r2)
+    arg = (dist - sphere.width) / sphere.spread
+    analytic = sphere._erfc_volume()
+    charge = sphere._charge()
+    scale = charge / analytic / SQRTPI / sphere.spread
+    exp = np.exp(-arg**2) * scale
+    density = sphere.volume + sp.erfc(arg) * charge / analytic * 0.5
+    gradient = -exp * r / dist
+    laplacian = -exp * (1 / dist - arg / sphere.spread) * 2
+    return density, gradient, laplacian, -exp
+
+
+@mark.parametrize('pos', [(0.3, 19.5, 5.1), (10.1, 10.2, 10.3)])
+@mark.parametrize('cubic_cell', [(40, 20)], indirect=['cubic_cell'])
+def test_shell(cubic_cell, pos):
+    """docstring"""
+    sphere = EnvironERFC(cubic_cell, 4, 0, 0, 2.5, 0.5, 1., np.array(pos))
+    density, gradient, laplacian, derivative = full_grid(sphere)
+
+    assert np.allclose(sphere.density, density, atol=1e-12)
+    assert np.allclose(sphere.gradient, gradient, atol=1e-12)
+    assert np.allclose(sphere.laplacian, laplacian, atol=1e-12)
+    assert np.allclose(sphere.derivative, derivative, atol=1e-12)
+    assert np.allclose(sphere.hessian.trace, laplacian, atol=1e-12)
+
+    gradient = sphere.local('gradient')
+    assert gradient.values.shape == (3, gradient.size)
+    assert gradient.size < cubic_cell.nnr / 8
+
+    # derivatives are only stored on the transition shell
+    sharp = EnvironERFC(cubic_cell, 4, 0, 0, 5., 0.2, 1., np.array(pos))
+    assert sharp.local('gradient').size < sharp.local('density').size
+    assert sharp.local('hessian').size == sharp.local('gradient').size
+    assert sphere.local('density').background == 1.
+    assert sphere.local('gradient').background == 0.
+
+
+@mark.parametrize('pos', [(0.3, 19.5, 5.1), (10.1, 10.2, 10.3)])
+@mark.parametrize('cubic_cell', [(40, 20)], indirect=['cubic_cell'])
+def test_log_factors(cubic_cell, pos):
+    """docstring"""
+    sphere = EnvironERFC(cubic_cell, 4, 0, 0, 2.5, 0.5, 1., np.array(pos))
+    density, gradient, laplacian, _ = full_grid(sphere)
+
+    logdensity = sphere.local('logdensity')
+    assert logdensity.size == sphere.local('density').size
+
+    L = np.exp(logdensity.to_dense(type(sphere.density)))
+    assert np.allclose(L, density, atol=1e-14)
+
+    G = sphere.local('loggradient').to_dense(type(sphere.gradient))
+    assert np.allclose(G * density, gradient, atol=1e-12)
+
+    lap = sphere.local('loglaplacian').to_dense(type(sphere.laplacian))
+    lap = (lap + np.einsum('i...,i...', G, G)) * density
+    assert np.allclose(lap, laplacian, atol=1e-10)
+
+    hessian = sphere.local('loghessian').to_dense(type(sphere.hessian))
+    assert np.allclose(hessian.trace, sphere.local('loglaplacian').to_dense(
+        type(sphere.laplacian)), atol=1e-10)
@@ -0,0 +1,35 @@
+from pytest import mark, approx
+
+from envyron.representations.functions import EnvironGaussian
+
+import numpy as np
+
+
+@mark.parametrize('spread', [0.5, 1., 3.])
+@mark.parametrize('pos', [(0.3, 19.5, 5.), (10., 10., 10.)])
+@mark.parametrize('cubic_cell', [(40, 20)], indirect=['cubic_cell'])
+def test_local_support(cubic_cell, pos, spread):
+    """docstring"""
+    gaussian = EnvironGaussian(cubic_cell, 1, 0, 0, 0., spread, 1.,
+                               np.array(pos))
+    r, r2 = cubic_cell.get_min_distance(gaussian.pos)
+    scale = 1. / (np.sqrt(np.pi) * spread)**3
+    expected = np.exp(-r2 / spread**2) * scale
+    assert np.allclose(gaussian.density, expected, atol=1e-12)
+    assert np.allclose(gaussian.gradient,
+                       -2. * r / spread**2 * expected,
+                       atol=1e-12)
+    assert gaussian.density.integral() == approx(1., abs=1e-3)
+
+
+@mark.parametrize('cubic_cell', [(40, 20)], indirect=['cubic_cell'])
+def test_local_distance(cubic_cell):
+    """docstring"""
+    origin = np.array([0.3, 19.5, 5.])
+    index, r, r2 = cubic_cell.get_local_distance(origin, 2.)
+    assert r2.shape == tuple(i.size for i in index)
+    _, full = cubic_cell.get_min_distance(origin)
+    mask = r2 <= 4.
+    assert np.allclose(full[index][mask], r2[mask])
+    assert np.count_nonzero(full <= 4.) == np.count_nonzero(mask)
+    assert cubic_cell.get_local_distance(origin, 15.) is None
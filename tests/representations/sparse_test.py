@@ -0,0 +1,53 @@
+from pytest import mark
+
+from envyron.representations import (
+    EnvironDensity,
+    EnvironGradient,
+    EnvironSparseField,
+)
+
+import numpy as np
+
+
+class TestSparseField:
+    """docstring"""
+
+    @mark.parametrize('unitary_cell', [4], indirect=['unitary_cell'])
+    def test_dense(self, unitary_cell):
+        """docstring"""
+        field = EnvironGradient(unitary_cell)
+        field[1, 0, 2, 3] = 2.
+        field[2, 3, 3, 3] = -1.
+        sparse = EnvironSparseField.from_dense(field)
+        assert sparse.size == 2
+        assert sparse.rank == 3
+        assert np.allclose(sparse.to_dense(EnvironGradient), field)
+        assert np.allclose(sparse.gather(field), sparse.values)
+
+    @mark.parametrize('unitary_cell', [4], indirect=['unitary_cell'])
+    def test_dense_background(self, unitary_cell):
+        """docstring"""
+        field = EnvironDensity(unitary_cell, np.full(unitary_cell.nr, 1.))
+        field[0, 2, 3] = 3.
+        field[3, 3, 3] = 0.
+        sparse = EnvironSparseField.from_dense(field, 1.)
+        assert sparse.size == 2
+        assert np.allclose(sparse.to_dense(EnvironDensity), field)
+
+    @mark.parametrize('unitary_cell', [4], indirect=['unitary_cell'])
+    def test_scatter(self, unitary_cell):
+        """docstring"""
+        sparse = EnvironSparseField(unitary_cell, [0, 5], [0.5, 2.], 1.)
+        density = EnvironDensity(unitary_cell, np.full(unitary_cell.nr, 3.))
+        version = density.version
+
+        sparse.scatter_add(density, 2.)
+        assert density.version > version
+        assert density.ravel()[0] == 6.
+        assert density.ravel()[5] == 9.
+        assert density.ravel()[1] == 5.
+
+        sparse.scatter_multiply(density)
+        assert density.ravel()[0] == 9.
+        assert density.ravel()[5] == 27.
+        assert density.ravel()[1] == 5.
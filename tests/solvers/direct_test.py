@@ -0,0 +1,28 @@
+from pytest import mark
+
+from envyron.cores import CoreContainer, FFTCore
+from envyron.representations import EnvironDensity
+from envyron.solvers import DirectSolver
+
+import numpy as np
+
+
+@mark.parametrize('hexagonal_cell', [(24, 10, 3)], indirect=['hexagonal_cell'])
+@mark.parametrize('cubic_cell', [(24, 10)], indirect=['cubic_cell'])
+def test_poisson_core(cubic_cell, hexagonal_cell):
+    """Double precision core potential matches the dftpy Hartree one"""
+    for cell in (cubic_cell, hexagonal_cell):
+        center = np.sum(cell.lattice, axis=0) * 0.5
+        _, r2 = cell.get_min_distance(center)
+        gaussian = np.exp(-r2 / 1.2**2)
+        density = EnvironDensity(cell, gaussian - gaussian.mean())
+
+        hartree = DirectSolver(CoreContainer('hartree'))
+        core = DirectSolver(
+            CoreContainer('double', electrostatics_core=FFTCore(cell)))
+
+        expected = hartree.poisson(density)
+        potential = core.poisson(density)
+
+        assert potential.dtype == np.float64
+        assert np.allclose(potential, expected, rtol=0., atol=1e-9)
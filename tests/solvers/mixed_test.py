@@ -0,0 +1,80 @@
+from pytest import fixture, mark, raises
+
+from envyron.cores import CoreContainer, FFTCore
+from envyron.physical import EnvironDielectric
+from envyron.representations import EnvironDensity
+from envyron.solvers import DirectSolver, GradientSolver, MixedPrecisionSolver
+from envyron.utils.constants import E2, FPI
+
+import numpy as np
+
+
+@fixture
+def dielectric():
+    """Create a smooth dielectric cavity in a given cell"""
+
+    def _dielectric(cell, dtype):
+        center = np.sum(cell.lattice, axis=0) * 0.5
+        _, r2 = cell.get_min_distance(center)
+        epsilon = EnvironDensity(cell, 1. + 77. * (1. - np.exp(-r2 / 9.)))
+        core = FFTCore(cell)
+        gradient = core.gradient(epsilon)
+        modulus2 = gradient.modulus**2
+        factsqrt = core.laplacian(epsilon) / 2 - modulus2 / epsilon / 4
+        factsqrt /= E2 * FPI
+        # only the fields used by the gradient solver are needed
+        dielectric = EnvironDielectric.__new__(EnvironDielectric)
+        dielectric.epsilon = EnvironDensity(cell, epsilon, dtype=dtype)
+        dielectric.factsqrt = EnvironDensity(cell, factsqrt, dtype=dtype)
+        return dielectric
+
+    return _dielectric
+
+
+@mark.parametrize('cubic_cell', [(32, 12)], indirect=['cubic_cell'])
+def test_mixed_precision(cubic_cell, dielectric):
+    """docstring"""
+    center = np.sum(cubic_cell.lattice, axis=0) * 0.5
+    _, r2 = cubic_cell.get_min_distance(center)
+    gaussian = np.exp(-r2 / 1.5**2)
+    density = EnvironDensity(cubic_cell, gaussian - gaussian.mean())
+
+    double = CoreContainer('double', electrostatics_core=FFTCore(cubic_cell))
+    single = CoreContainer(
+        'single',
+        electrostatics_core=FFTCore(cubic_cell, dtype=np.float32),
+    )
+
+    reference = GradientSolver(double, DirectSolver(double), tol=1e-10)
+    expected = reference.generalized(
+        density,
+        dielectric(cubic_cell, np.float64),
+    )
+
+    inner = GradientSolver(single, DirectSolver(single), tol=1e-10)
+    mixed = MixedPrecisionSolver(double, DirectSolver(double), inner, tol=1e-10)
+    potential = mixed.generalized(density, dielectric(cubic_cell, np.float32))
+
+    assert inner.generalized(density, dielectric(cubic_cell, np.float32)) \
+        .dtype == np.float32
+    assert potential.dtype == np.float64
+    assert np.allclose(potential, expected, atol=1e-6)
+
+    # the relaxed tolerances of the refinement are not kept
+    assert inner.tol == 1e-10
+
+
+@mark.parametrize('cubic_cell', [(16, 12)], indirect=['cubic_cell'])
+def test_failed_solve_releases_workspace(cubic_cell, dielectric):
+    """docstring"""
+    density = EnvironDensity(cubic_cell)
+    cores = CoreContainer('double', electrostatics_core=FFTCore(cubic_cell))
+    solver = GradientSolver(cores, DirectSolver(cores))
+
+    broken = dielectric(cubic_cell, np.float64)
+    del broken.factsqrt
+
+    with raises(AttributeError):
+        solver.generalized(density, broken)
+
+    assert cores.workspace.nbytes_in_use == 0
@@ -0,0 +1,68 @@
+from pytest import fixture, importorskip, mark
+
+from envyron.utils import kernels
+from envyron.utils.constants import TPI
+
+import numpy as np
+
+RHOMIN = 1e-4
+RHOMAX = 5e-3
+
+
+@fixture(params=['numpy', 'numba'])
+def implementation(request):
+    """Get a kernel implementation, skipping numba if not installed"""
+
+    def _implementation(name):
+        if request.param == 'numba': importorskip('numba')
+        return getattr(kernels, f"_{name}_{request.param}")
+
+    return _implementation
+
+
+@mark.parametrize('dtype', [np.float64, np.float32])
+def test_switching_function(implementation, dtype):
+    """docstring"""
+    rho = np.geomspace(1e-6, 1e-1, 1000)
+    band = np.flatnonzero((RHOMIN < rho) & (rho < RHOMAX))
+    factor = np.log(RHOMAX / RHOMIN)
+
+    outputs = [np.full(rho.size, -1., dtype=dtype) for _ in range(3)]
+    switching_function = implementation('switching_function')
+    switching_function(rho, band, RHOMAX, factor, *outputs)
+
+    arg = np.log(RHOMAX / rho[band]) * TPI / factor
+    scaled = rho[band] * factor
+    expected = (
+        1. - (arg - np.sin(arg)) / TPI,
+        (1. - np.cos(arg)) / scaled,
+        -(TPI * np.sin(arg) + factor * (1. - np.cos(arg))) / scaled**2,
+    )
+
+    for output, reference in zip(outputs, expected):
+        atol = np.abs(reference).max() * np.finfo(dtype).eps * 100
+        assert np.allclose(output[band], reference, rtol=0., atol=atol)
+
+    # points outside of the band are left untouched
+    assert np.all(outputs[0][rho >= RHOMAX] == -1.)
+
+
+def test_dielectric_profiles(implementation):
+    """docstring"""
+    switch = np.linspace(0., 1., 101)
+    constants = (78.3, 1.776)
+    backgrounds = tuple(np.full(switch.size, c) for c in constants)
+    epsilons, depsilons, dlogepsilons = (
+        tuple(np.empty(switch.size) for _ in constants) for _ in range(3))
+
+    dielectric_profiles = implementation('dielectric_profiles')
+    dielectric_profiles(switch, backgrounds, epsilons, depsilons,
+                        dlogepsilons)
+
+    for k, constant in enumerate(constants):
+        log = np.log(constant)
+        assert np.allclose(epsilons[k], np.exp(log * (1. - switch)))
+        assert np.allclose(depsilons[k], -epsilons[k] * log)
+        assert np.allclose(dlogepsilons[k], -log)
+        assert np.isclose(epsilons[k][0], constant)
+        assert np.isclose(epsilons[k][-1], 1.)